@@ -10,9 +10,12 @@ from homeassistant.components.lovelace.const import CONF_RESOURCE_TYPE_WS, CONF_
 from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import STORAGE_DIR
 
-from .const import DOMAIN, CONF_MAC
+from .const import DOMAIN, CONF_MAC, CONF_PROCESS_POOL
 from .client.connectionManager import ConnectionManager
+from .client import fontLoader
+from .executor import get_render_executor
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,10 +94,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # For now, we will assume one device per integration instance or update the singleton.
     
     hass.data[DOMAIN][entry.entry_id] = entry.data
-    
+
+    # Compile bundled BDF fonts once into HA's storage dir
+    if not hass.data[DOMAIN].get("_fonts_compiled"):
+        fontLoader.set_cache_dir(hass.config.path(STORAGE_DIR, DOMAIN, "fonts"))
+        await hass.async_add_executor_job(fontLoader.precompile_bundled_fonts)
+        hass.data[DOMAIN]["_fonts_compiled"] = True
+
     # Initialize the Singleton ConnectionManager with the device address
     manager = ConnectionManager()
     manager.set_hass(hass)
+    executor = get_render_executor(hass)
+    executor.set_process_backend(
+        any(
+            config_entry.options.get(CONF_PROCESS_POOL, False)
+            for config_entry in hass.config_entries.async_entries(DOMAIN)
+        )
+    )
+    manager.set_executor(executor)
     manager.address = entry.data[CONF_MAC]
 
     from .coordinator import IDotMatrixCoordinator
@@ -165,7 +182,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             
             # Convert to base64 PNG
             buffer = io.BytesIO()
-            image.save(buffer, format="PNG")
+            await get_render_executor(hass).async_run(image.save, buffer, format="PNG")
             buffer.seek(0)
             b64_image = base64.b64encode(buffer.read()).decode("utf-8")
             
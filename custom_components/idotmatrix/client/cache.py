@@ -0,0 +1,117 @@
+"""In-memory caches used by the iDotMatrix client and renderer."""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+MISSING = object()
+
+
+def image_nbytes(img) -> int:
+    """Estimate the resident size of a PIL image."""
+    if img is None:
+        return 0
+    width, height = img.size
+    return width * height * len(img.getbands())
+
+
+class LRUCache:
+    """Byte-budgeted LRU cache with expiring negative entries.
+
+    Values are accounted with ``sizeof``; the least recently used entries
+    are evicted once the total exceeds ``max_bytes``. Failures can be
+    recorded with ``put_negative`` and are forgotten after ``negative_ttl``
+    seconds so transient errors get retried. With ``ttl`` set, values
+    expire too, so their source gets consulted again.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        negative_ttl: float = 300.0,
+        sizeof: Callable[[Any], int] = image_nbytes,
+        ttl: float | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        self.ttl = ttl
+        self._sizeof = sizeof
+        # key -> (value, size, expires_at or None)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float | None]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not MISSING
+
+    def get(self, key: Hashable, count: bool = True) -> Any:
+        """Return the cached value (None for negative entries) or MISSING."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, size, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            self._remove(key)
+        if count:
+            self.misses += 1
+        return MISSING
+
+    def put(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        """Store a value, evicting least recently used entries as needed."""
+        if size is None:
+            size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        self._evict()
+
+    def put_negative(self, key: Hashable) -> None:
+        """Remember a failed lookup for ``negative_ttl`` seconds."""
+        self._remove(key)
+        self._entries[key] = (None, 0, time.monotonic() + self.negative_ttl)
+        self._evict()
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._bytes = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return cache statistics for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self) -> None:
+        # Bound negative entries too: they cost no bytes but an unbounded
+        # icon_template could otherwise grow the dict forever.
+        max_entries = max(self.max_bytes // 64, 64)
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > max_entries):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
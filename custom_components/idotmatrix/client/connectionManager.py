@@ -5,6 +5,9 @@ import logging
 import time
 from typing import List, Optional
 
+# Weight of the newest transfer in the link rate moving average
+LINK_RATE_SMOOTHING = 0.3
+
 
 class SingletonMeta(type):
     logging = logging.getLogger(__name__)
@@ -28,11 +31,39 @@ class ConnectionManager(metaclass=SingletonMeta):
         self.address: Optional[str] = None
         self.client: Optional[BleakClient] = None
         self.hass = None
+        self.executor = None
+        # Smoothed throughput of recent sends in bytes per second
+        self.link_rate: Optional[float] = None
+        # Incremented on every send; lets callers tell whether anything else
+        # was sent to the device since they last changed its display
+        self.send_count = 0
 
     def set_hass(self, hass):
         """Set Home Assistant instance for proxy support."""
         self.hass = hass
 
+    def set_executor(self, executor):
+        """Set the executor used for CPU-bound rendering and encoding."""
+        self.executor = executor
+
+    async def run_job(self, func, *args):
+        """Run blocking image work off the event loop.
+
+        Prefers the integration's render executor, then Home Assistant's
+        executor, then a plain worker thread when running standalone.
+        """
+        if self.executor:
+            return await self.executor.async_run(func, *args)
+        if self.hass:
+            return await self.hass.async_add_executor_job(func, *args)
+        return await asyncio.to_thread(func, *args)
+
+    async def run_cpu_job(self, func, *args):
+        """Run a picklable module-level function, in a worker process if enabled."""
+        if self.executor:
+            return await self.executor.async_run_cpu(func, *args)
+        return await self.run_job(func, *args)
+
     @staticmethod
     async def scan() -> List[tuple[str, str]]:
         # This basic scan might not find proxy devices if not integrated with HA scanning
@@ -121,14 +152,29 @@ class ConnectionManager(metaclass=SingletonMeta):
     async def send(self, data, response=False):
         if self.client and self.client.is_connected:
             self.logging.debug("sending message(s) to device")
+            self.send_count += 1
             chunk_size = self.client.services.get_characteristic(UUID_WRITE_DATA).max_write_without_response_size
+            start = time.monotonic()
             for i in range(0, len(data), chunk_size):
                 await self.client.write_gatt_char(UUID_WRITE_DATA,data[i:i+chunk_size], response=response)
                 await asyncio.sleep(0.05)
+            if len(data) > chunk_size:
+                # single-packet commands are dominated by the pacing delay
+                self._record_throughput(len(data), time.monotonic() - start)
 
             await asyncio.sleep(0.01)
             return True
 
+    def _record_throughput(self, size: int, elapsed: float) -> None:
+        """Fold one transfer into the smoothed link rate."""
+        if elapsed <= 0:
+            return
+        rate = size / elapsed
+        if self.link_rate is None:
+            self.link_rate = rate
+        else:
+            self.link_rate += LINK_RATE_SMOOTHING * (rate - self.link_rate)
+
     async def read(self) -> bytes:
         if self.client and self.client.is_connected:
             data = await self.client.read_gatt_char(UUID_READ_DATA)
@@ -0,0 +1,124 @@
+"""Font loading helpers shared by the text module and the integration's renderers."""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+
+from PIL import BdfFontFile, ImageFont
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fonts bundled with the integration this client ships in
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+DEFAULT_FONT = "Rain-DRM3.otf"
+
+_cache_dir: str | None = None
+_compile_lock = threading.Lock()
+_bitmap_fonts: dict[str, ImageFont.ImageFont] = {}
+
+
+def set_cache_dir(path: str) -> None:
+    """Set the directory compiled bitmap fonts are stored in."""
+    global _cache_dir
+    _cache_dir = path
+
+
+def get_cache_dir() -> str | None:
+    """Return the directory set with ``set_cache_dir``, if any."""
+    return _cache_dir
+
+
+def resolve_font_path(font_name: str | None) -> str:
+    """Resolve a font name to a file path, falling back to the bundled default."""
+    default = os.path.join(FONTS_DIR, DEFAULT_FONT)
+    if not font_name:
+        return default
+    if os.path.isabs(font_name):
+        return font_name if os.path.exists(font_name) else default
+    potential = os.path.join(FONTS_DIR, font_name)
+    if os.path.exists(potential):
+        return potential
+    return default
+
+
+def is_bdf(font_path: str | None) -> bool:
+    """Return True if the path points to a BDF bitmap font."""
+    return bool(font_path) and font_path.lower().endswith(".bdf")
+
+
+def is_bitmap_font(font) -> bool:
+    """Return True for PIL bitmap fonts (fixed size, never antialiased)."""
+    return isinstance(font, ImageFont.ImageFont)
+
+
+def compile_bdf(bdf_path: str) -> str:
+    """Compile a BDF font into PIL's bitmap format and return the .pil path.
+
+    Compiled files are keyed by name and modification time so an updated
+    source font is recompiled once and then reused across restarts.
+    """
+    cache_dir = _cache_dir or os.path.join(tempfile.gettempdir(), "idotmatrix_fonts")
+    stem = os.path.splitext(os.path.basename(bdf_path))[0]
+    mtime = int(os.stat(bdf_path).st_mtime)
+    base = os.path.join(cache_dir, f"{stem}-{mtime}")
+    pil_path = f"{base}.pil"
+
+    with _compile_lock:
+        if os.path.exists(pil_path) and os.path.exists(f"{base}.pbm"):
+            return pil_path
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(bdf_path, "rb") as fp:
+            font_file = BdfFontFile.BdfFontFile(fp)
+        font_file.save(base)
+        _LOGGER.debug("Compiled bitmap font %s to %s", bdf_path, pil_path)
+
+        # Drop stale compilations of the same font
+        for filename in os.listdir(cache_dir):
+            if filename.startswith(f"{stem}-") and not filename.startswith(f"{stem}-{mtime}."):
+                try:
+                    os.remove(os.path.join(cache_dir, filename))
+                except OSError:
+                    pass
+    return pil_path
+
+
+def load_font(font_path: str, size: int):
+    """Load a font, compiling BDF fonts on first use.
+
+    BDF fonts have a fixed pixel size, so ``size`` only applies to
+    TrueType/OpenType fonts. Raises on failure so callers can pick their
+    own fallback.
+    """
+    if not is_bdf(font_path):
+        return ImageFont.truetype(font_path, size)
+
+    font = _bitmap_fonts.get(font_path)
+    if font is None:
+        font = ImageFont.load(compile_bdf(font_path))
+        _bitmap_fonts[font_path] = font
+    return font
+
+
+def font_metrics(font) -> tuple[int, int]:
+    """Return (ascent, descent) for TrueType and bitmap fonts alike."""
+    if hasattr(font, "getmetrics"):
+        return font.getmetrics()
+    bbox = font.getbbox("Ag")
+    return bbox[3], 0
+
+
+def precompile_bundled_fonts() -> None:
+    """Compile all bundled BDF fonts so renders never pay the compile cost."""
+    if not os.path.isdir(FONTS_DIR):
+        return
+    for filename in sorted(os.listdir(FONTS_DIR)):
+        path = os.path.join(FONTS_DIR, filename)
+        if not is_bdf(path):
+            continue
+        try:
+            load_font(path, 0)
+        except Exception as exc:
+            _LOGGER.warning("Failed to compile bitmap font %s: %s", filename, exc)
@@ -1,11 +1,26 @@
-from typing import Union, List
+from typing import Optional, Union, List, Tuple
 from ..connectionManager import ConnectionManager
+from .image import DEFAULT_LINK_RATE
+from ..quantize import quantize
 import io
 import logging
-from PIL import Image as PilImage
+from PIL import GifImagePlugin, Image as PilImage, ImageChops, ImageSequence, ImageStat
+import struct
 import zlib
 
 
+# Frames kept from long animations; each 32x32 frame is only 3 KiB resident
+MAX_FRAMES = 150
+# Frame duration (ms) assumed when the source doesn't specify one
+DEFAULT_FRAME_DURATION = 100
+# Palette index reserved for pixels that didn't change since the previous frame
+TRANSPARENT_INDEX = 255
+# Budget mode: mean channel differences (0-255) up to which frames count as duplicates
+DUPLICATE_TOLERANCES = (1, 2, 4, 8, 16)
+# Budget mode: smallest palette tried before the frame rate is reduced
+MIN_COLORS = 16
+
+
 class Gif:
     logging = logging.getLogger(__name__)
 
@@ -113,48 +128,323 @@ class Gif:
             return False
 
     async def uploadProcessed(
-        self, file_path: str, pixel_size: int = 32
+        self,
+        file_path: str,
+        pixel_size: int = 32,
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
     ) -> Union[bool, bytearray]:
         """uploads a file processed to make sure everything is correct before uploading to the device.
 
+        With max_bytes or max_seconds set, the animation is reduced until it
+        fits: near-duplicate frames are dropped first, then the palette is
+        shrunk, then the frame rate is halved.
+
         Args:
             file_path (str): path to the image file
             pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+            max_bytes (Optional[int], optional): size budget of the encoded gif. Defaults to None.
+            max_seconds (Optional[float], optional): upload time budget at the measured link rate. Defaults to None.
 
         Returns:
             Union[bool, bytearray]: False if there's an error, otherwise returns bytearray payload
         """
         try:
-            with PilImage.open(file_path) as img:
-                frames = []
-                try:
-                    while True:
-                        frame = img.copy()
-                        if frame.size != (pixel_size, pixel_size):
-                            frame = frame.resize(
-                                (pixel_size, pixel_size), PilImage.NEAREST
-                            )
-                        frames.append(frame.copy())
-                        img.seek(img.tell() + 1)
-                except EOFError:
-                    pass
-                gif_buffer = io.BytesIO()
-                frames[0].save(
-                    gif_buffer,
-                    format="GIF",
-                    save_all=True,
-                    append_images=frames[1:],
-                    loop=1,
-                    duration=img.info["duration"],
-                    disposal=2,
+            if max_seconds is not None:
+                budget = int(max_seconds * (self.conn.link_rate or DEFAULT_LINK_RATE))
+                max_bytes = min(max_bytes, budget) if max_bytes else budget
+            gif_data = await self.conn.run_cpu_job(
+                transcode_gif, file_path, pixel_size, MAX_FRAMES, max_bytes
+            )
+            if max_bytes and len(gif_data) > max_bytes:
+                self.logging.warning(
+                    f"gif of {len(gif_data)} bytes exceeds the {max_bytes} byte budget"
                 )
-                gif_buffer.seek(0)
-                data = self._createPayloads(gif_buffer.getvalue())
-                if self.conn:
-                    await self.conn.connect()
-                    for chunk in data:
-                        await self.conn.send(data=chunk, response=True)
-                return data
+            data = self._createPayloads(gif_data)
+            if self.conn:
+                await self.conn.connect()
+                for chunk in data:
+                    await self.conn.send(data=chunk, response=True)
+            return data
         except BaseException as error:
             self.logging.error(f"could not upload gif processed: {error}")
             return False
+
+    async def uploadFrames(
+        self,
+        frames: List[PilImage.Image],
+        durations: List[int],
+        loop: int = 0,
+    ) -> Union[bool, bytearray]:
+        """Encodes in-memory frames into one animation and uploads it.
+
+        The device then plays the animation on its own, without further
+        traffic, e.g. for text effects rendered by the integration.
+
+        Args:
+            frames (List[PilImage.Image]): RGB frames at the device resolution
+            durations (List[int]): duration of each frame in ms
+            loop (int, optional): loop count, 0 loops forever. Defaults to 0.
+
+        Returns:
+            Union[bool, bytearray]: False if there's an error, otherwise returns bytearray payload
+        """
+        try:
+            gif_data = await self.conn.run_cpu_job(
+                encodeAnimation, frames, durations, loop
+            )
+            data = self._createPayloads(gif_data)
+            if self.conn:
+                await self.conn.connect()
+                for chunk in data:
+                    await self.conn.send(data=chunk, response=True)
+            return data
+        except BaseException as error:
+            self.logging.error(f"could not upload gif frames: {error}")
+            return False
+
+    async def sendPayloads(self, payloads: Tuple[bytes, ...]) -> bool:
+        """Sends payloads that were framed with _createPayloads ahead of time.
+
+        Args:
+            payloads (Tuple[bytes, ...]): framed payloads
+
+        Returns:
+            bool: False if there's an error, otherwise True
+        """
+        try:
+            if self.conn:
+                await self.conn.connect()
+                for chunk in payloads:
+                    await self.conn.send(data=chunk, response=True)
+            return True
+        except BaseException as error:
+            self.logging.error(f"could not send the gif: {error}")
+            return False
+
+
+def transcode_gif(
+    file_path: str,
+    pixel_size: int = 32,
+    max_frames: int = MAX_FRAMES,
+    max_bytes: Optional[int] = None,
+) -> bytes:
+    """Resizes every frame of a GIF file to the device size.
+
+    Frames are decoded one at a time and only the resized copies are kept.
+    Sources longer than max_frames keep every n-th frame, and the durations
+    of skipped frames are folded into the kept ones so playback speed is
+    unchanged. Module level so it can run in a worker process.
+
+    Args:
+        file_path (str): path to the gif file
+        pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+        max_frames (int, optional): upper bound of frames in the result. Defaults to MAX_FRAMES.
+        max_bytes (Optional[int], optional): size budget, see fitToBudget. Defaults to None.
+
+    Returns:
+        bytes: GIF file contents
+    """
+    frames, durations = _readFrames(file_path, pixel_size, max_frames)
+    if max_bytes:
+        return fitToBudget(frames, durations, max_bytes)
+    return encodeAnimation(frames, durations)
+
+
+def fitToBudget(
+    frames: List[PilImage.Image], durations: List[int], max_bytes: int
+) -> bytes:
+    """Encodes an animation, degrading it step by step until it fits max_bytes.
+
+    Near-duplicate frames are merged with increasing tolerance first, then
+    the palette is stepped down through powers of two to MIN_COLORS, then
+    the frame rate is halved. Total playback time is kept throughout. If
+    even a single frame with the smallest palette is too big, that smallest
+    result is returned.
+
+    Args:
+        frames (List[PilImage.Image]): RGB frames of equal size
+        durations (List[int]): duration of each frame in ms
+        max_bytes (int): size budget of the encoded gif
+
+    Returns:
+        bytes: GIF file contents
+    """
+    tolerances = iter(DUPLICATE_TOLERANCES)
+    colors = TRANSPARENT_INDEX
+    gif_data = encodeAnimation(frames, durations, colors=colors)
+    while len(gif_data) > max_bytes:
+        tolerance = next(tolerances, None)
+        if tolerance is not None:
+            frames, durations = _mergeSimilarFrames(frames, durations, tolerance)
+        elif colors > MIN_COLORS:
+            # next smaller power of two, the sizes a GIF color table comes in
+            colors = max(MIN_COLORS, 1 << ((colors - 1).bit_length() - 1))
+        elif len(frames) > 1:
+            frames, durations = _halveFrameRate(frames, durations)
+        else:
+            break
+        gif_data = encodeAnimation(frames, durations, colors=colors)
+    return gif_data
+
+
+def _mergeSimilarFrames(
+    frames: List[PilImage.Image], durations: List[int], tolerance: float
+) -> Tuple[List[PilImage.Image], List[int]]:
+    """Drops frames whose mean channel difference to the last kept frame is within tolerance."""
+    kept, kept_durations = [frames[0]], [durations[0]]
+    for frame, duration in zip(frames[1:], durations[1:]):
+        difference = ImageStat.Stat(ImageChops.difference(kept[-1], frame)).mean
+        if sum(difference) / len(difference) <= tolerance:
+            kept_durations[-1] += duration
+        else:
+            kept.append(frame)
+            kept_durations.append(duration)
+    return kept, kept_durations
+
+
+def _halveFrameRate(
+    frames: List[PilImage.Image], durations: List[int]
+) -> Tuple[List[PilImage.Image], List[int]]:
+    """Keeps every second frame, folding the dropped durations into the kept ones."""
+    kept_durations = [
+        sum(durations[i : i + 2]) for i in range(0, len(durations), 2)
+    ]
+    return frames[::2], kept_durations
+
+
+def encodeAnimation(
+    frames: List[PilImage.Image],
+    durations: List[int],
+    loop: int = 1,
+    colors: int = TRANSPARENT_INDEX,
+) -> bytes:
+    """Encodes RGB frames as a delta-optimized GIF.
+
+    All frames share one global palette, so no frame carries a local color
+    table. Every frame after the first is cropped to the box that changed
+    since the previous one, pixels inside the box that didn't change are
+    transparent, and frames use disposal 1 (keep) so each delta is drawn on
+    top of what is already shown. Identical frames are merged into the
+    previous frame's duration.
+
+    Args:
+        frames (List[PilImage.Image]): RGB frames of equal size
+        durations (List[int]): duration of each frame in ms
+        loop (int, optional): loop count of the animation. Defaults to 1.
+        colors (int, optional): palette size, at most 255. Defaults to TRANSPARENT_INDEX.
+
+    Returns:
+        bytes: GIF file contents
+    """
+    palette, indexed = _globalPalette(frames, colors)
+    width, height = frames[0].size
+
+    gif_buffer = io.BytesIO()
+    # header and logical screen with a 256 entry global color table
+    gif_buffer.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF7, 0, 0))
+    gif_buffer.write(palette)
+    # NETSCAPE2.0 application extension carrying the loop count
+    gif_buffer.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    pending = None
+    previous = None
+    for frame, duration in zip(indexed, durations):
+        if previous is None:
+            pending = [frame, (0, 0), duration]
+            previous = frame
+            continue
+        diff = ImageChops.difference(_indexPlane(previous), _indexPlane(frame))
+        bbox = diff.getbbox()
+        if bbox is None:
+            pending[2] += duration
+            continue
+        _writeFrame(gif_buffer, *pending)
+        delta = frame.crop(bbox)
+        unchanged = diff.crop(bbox).point(lambda value: 255 if value == 0 else 0)
+        delta.paste(TRANSPARENT_INDEX, mask=unchanged)
+        pending = [delta, bbox[:2], duration]
+        previous = frame
+    _writeFrame(gif_buffer, *pending)
+
+    gif_buffer.write(b";")
+    return gif_buffer.getvalue()
+
+
+def _globalPalette(
+    frames: List[PilImage.Image], colors: int = TRANSPARENT_INDEX
+) -> Tuple[bytes, List[PilImage.Image]]:
+    """Quantizes all frames together to one palette of at most colors entries.
+
+    The frames are stacked into one image so they are quantized jointly;
+    this is lossless when the animation uses no more than colors colors.
+    Animations are not dithered: dither noise changes between frames, which
+    flickers and defeats the delta optimization.
+
+    Args:
+        frames (List[PilImage.Image]): RGB frames of equal size
+        colors (int, optional): palette size, at most 255. Defaults to TRANSPARENT_INDEX.
+
+    Returns:
+        Tuple[bytes, List[PilImage.Image]]: 768 byte color table and the frames as "P" images
+    """
+    width, height = frames[0].size
+    strip = PilImage.new("RGB", (width, height * len(frames)))
+    for i, frame in enumerate(frames):
+        strip.paste(frame, (0, i * height))
+    strip = quantize(strip, min(colors, TRANSPARENT_INDEX))
+    palette = bytes(strip.getpalette()[: 3 * 256]).ljust(768, b"\x00")
+    indexed = [strip.crop((0, i * height, width, (i + 1) * height)) for i in range(len(frames))]
+    return palette, indexed
+
+
+def _indexPlane(frame: PilImage.Image) -> PilImage.Image:
+    """Returns the raw palette indices of a "P" image as an "L" image."""
+    return PilImage.frombytes("L", frame.size, frame.tobytes())
+
+
+def _writeFrame(
+    gif_buffer: io.BytesIO, frame: PilImage.Image, offset: Tuple[int, int], duration: int
+) -> None:
+    """Writes one frame (control extension, descriptor and LZW data) without a local color table."""
+    for block in GifImagePlugin.getdata(
+        frame,
+        offset,
+        duration=duration,
+        disposal=1,
+        transparency=TRANSPARENT_INDEX,
+    ):
+        gif_buffer.write(block)
+
+
+def _readFrames(
+    file_path: str, pixel_size: int, max_frames: int
+) -> Tuple[List[PilImage.Image], List[int]]:
+    """Streams frames out of an animation, resized and flattened onto black.
+
+    Args:
+        file_path (str): path to the gif file
+        pixel_size (int): amount of pixels
+        max_frames (int): upper bound of frames kept
+
+    Returns:
+        Tuple[List[PilImage.Image], List[int]]: RGB frames and their durations in ms
+    """
+    frames: List[PilImage.Image] = []
+    durations: List[int] = []
+    with PilImage.open(file_path) as img:
+        stride = -(-getattr(img, "n_frames", 1) // max_frames)
+        for index, frame in enumerate(ImageSequence.Iterator(img)):
+            duration = frame.info.get("duration") or DEFAULT_FRAME_DURATION
+            if index % stride:
+                durations[-1] += duration
+                continue
+            frame = frame.convert("RGBA")
+            if frame.size != (pixel_size, pixel_size):
+                frame = frame.resize((pixel_size, pixel_size), PilImage.NEAREST)
+            # transparent pixels are unlit LEDs
+            flat = PilImage.new("RGB", frame.size, (0, 0, 0))
+            flat.paste(frame, mask=frame.getchannel("A"))
+            frames.append(flat)
+            durations.append(duration)
+    return frames, durations
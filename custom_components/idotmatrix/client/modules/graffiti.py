@@ -1,6 +1,12 @@
-from typing import Union
+from typing import Iterable, List, Tuple, Union
 from ..connectionManager import ConnectionManager
 import logging
+import numpy as np
+
+
+# Coordinates per graffiti packet; the length field would allow more, but
+# short packets keep a single lost write cheap
+MAX_PIXELS_PER_PACKET = 100
 
 
 class Graffiti:
@@ -73,3 +79,81 @@ class Graffiti:
         except BaseException as error:
             self.logging.error(f"could not update the Graffiti Board: {error}")
             return False
+
+    async def setPixels(
+        self,
+        pixels: Union[np.ndarray, Iterable[Tuple[int, int, Tuple[int, int, int]]]],
+    ) -> Union[bool, bytearray]:
+        """Set many pixels at once.
+
+        Pixels are grouped by color into multi-coordinate graffiti packets,
+        which are sent back to back in one transfer instead of one write per
+        pixel. If a pixel is given more than once, the last color wins.
+
+        Args:
+            pixels: (x, y, (r, g, b)) tuples, or an integer array of shape (n, 5) with x, y, r, g, b columns
+
+        Returns:
+            Union[bool, bytearray]: False if there's an error, otherwise byte array of the commands which need to be sent to the device.
+        """
+        try:
+            if isinstance(pixels, np.ndarray):
+                points = pixels.astype(np.int64, copy=False).reshape(-1, 5)
+            else:
+                points = np.array(
+                    [(x, y, *color) for x, y, color in pixels], dtype=np.int64
+                ).reshape(-1, 5)
+            if ((points < 0) | (points > 255)).any():
+                self.logging.error(
+                    "Graffiti.setPixels expects x, y, r, g and b to be between 0 and 255"
+                )
+                return False
+            data = bytearray().join(buildPixelPackets(points))
+            if data and self.conn:
+                await self.conn.connect()
+                await self.conn.send(data=data)
+            return data
+        except BaseException as error:
+            self.logging.error(f"could not update the Graffiti Board: {error}")
+            return False
+
+
+def buildPixelPackets(
+    points: np.ndarray, max_pixels: int = MAX_PIXELS_PER_PACKET
+) -> List[bytes]:
+    """Builds graffiti packets that each set one color on many pixels.
+
+    Args:
+        points (np.ndarray): validated array of shape (n, 5) with x, y, r, g, b columns
+        max_pixels (int, optional): coordinates per packet. Defaults to MAX_PIXELS_PER_PACKET.
+
+    Returns:
+        List[bytes]: packets in the [length, 5, 1, 0, r, g, b, x1, y1, x2, y2, ...] format
+    """
+    if not len(points):
+        return []
+    # keep the last occurrence of every coordinate, as if sent in order
+    reversed_points = points[::-1]
+    _, last = np.unique(
+        reversed_points[:, 0] * 256 + reversed_points[:, 1], return_index=True
+    )
+    points = reversed_points[np.sort(last)][::-1]
+
+    keys = (points[:, 2] << 16) | (points[:, 3] << 8) | points[:, 4]
+    order = np.argsort(keys, kind="stable")
+    points = points[order]
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(points)]
+
+    packets = []
+    for start, end in zip(starts, ends):
+        color = points[start, 2:5].astype(np.uint8).tobytes()
+        coordinates = points[start:end, :2].astype(np.uint8).tobytes()
+        for offset in range(0, len(coordinates), max_pixels * 2):
+            chunk = coordinates[offset : offset + max_pixels * 2]
+            length = 8 + len(chunk)
+            packets.append(
+                length.to_bytes(2, byteorder="little") + b"\x05\x01\x00" + color + chunk
+            )
+    return packets
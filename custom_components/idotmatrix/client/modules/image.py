@@ -1,13 +1,35 @@
-from typing import Union, List
+from typing import Optional, Union, List, Tuple
 from ..connectionManager import ConnectionManager
+from ..cache import LRUCache, MISSING
+from ..quantize import quantize
+import hashlib
 import io
 import logging
 from PIL import Image as PilImage
 import struct
+import zlib
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Framed payloads of recently shown frames; faces often cycle through a few states
+PAYLOAD_CACHE_MAX_BYTES = 512 * 1024
+# PNG settings tried per frame (optimize adds adaptive row filters)
+ENCODER_LADDER = (
+    {"compress_level": 1},
+    {"compress_level": 9, "compress_type": zlib.Z_RLE},
+    {"compress_level": 6},
+    {"compress_level": 9, "optimize": True},
+)
+# Link throughput (bytes/s) assumed until a transfer has been measured
+DEFAULT_LINK_RATE = 2000.0
 
 
 class Image:
     logging = logging.getLogger(__name__)
+    # shared by all instances, keyed by (size, digest of the RGB pixels)
+    payload_cache = LRUCache(
+        PAYLOAD_CACHE_MAX_BYTES, sizeof=lambda chunks: sum(map(len, chunks))
+    )
 
     def __init__(self) -> None:
         self.conn: ConnectionManager = ConnectionManager()
@@ -55,26 +77,36 @@ class Image:
         """
         return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
 
-    def _createPayloads(self, png_data: bytearray) -> bytearray:
+    def _createPayloads(
+        self, png_data: bytearray, chunk_size: int = 4096
+    ) -> List[bytearray]:
         """Creates payloads from a PNG file.
 
+        Like GIF uploads, every chunk carries its own header: the chunk length
+        including the header (unsigned 16-bit), two zero bytes, 0 for the first
+        chunk and 2 for the following ones, and the total PNG length (unsigned
+        32-bit).
+
         Args:
             png_data (bytearray): data of the png file
+            chunk_size (int): size of a chunk
 
         Returns:
-            bytearray: returns bytearray payload
+            List[bytearray]: returns list of payloads, one per chunk
+
+        Raises:
+            ValueError: if png_data is not a well-formed PNG
         """
-        png_chunks = self._splitIntoChunks(png_data, 4096)
-        idk = len(png_data) + len(png_chunks)
-        idk_bytes = struct.pack("h", idk)  # Convert to 16-bit signed int
-        png_len_bytes = struct.pack("i", len(png_data))
-        payloads = bytearray()
-        for i, chunk in enumerate(png_chunks):
-            payload = (
-                idk_bytes + bytearray([0, 0, 2 if i > 0 else 0]) + png_len_bytes + chunk
-            )
-            payloads.extend(payload)
-        return payloads
+        validatePNG(png_data)
+        header = bytearray([0, 0, 0, 0, 0]) + struct.pack("<I", len(png_data))
+        chunks = []
+        for i, chunk in enumerate(self._splitIntoChunks(png_data, chunk_size)):
+            # set chunk length in header
+            header[0:2] = struct.pack("<H", len(chunk) + len(header))
+            # starting from the second chunk, set the header to 2
+            header[4] = 2 if i > 0 else 0
+            chunks.append(header + chunk)
+        return chunks
 
     async def uploadUnprocessed(self, file_path: str) -> Union[bool, bytearray]:
         """Uploads an image without further checks and resizes.
@@ -90,53 +122,262 @@ class Image:
             data = self._createPayloads(png_data)
             if self.conn:
                 await self.conn.connect()
-                await self.conn.send(data=data)
+                for chunk in data:
+                    await self.conn.send(data=chunk, response=True)
             return data
         except BaseException as error:
             self.logging.error(f"could not upload the unprocessed image: {error}")
             return False
 
     async def uploadProcessed(
-        self, file_path: str, pixel_size: int = 32
+        self,
+        file_path: str,
+        pixel_size: int = 32,
+        colors: Optional[int] = None,
+        dither: Optional[str] = None,
     ) -> Union[bool, bytearray]:
         """Uploads a file processed and makes sure everything is correct before uploading to the device.
 
         Args:
             file_path (str): path to the image file
             pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+            colors (Optional[int], optional): quantize to a palette of this many colors (photos). Defaults to None.
+            dither (Optional[str], optional): "ordered" or "floyd_steinberg" when quantizing. Defaults to None.
 
         Returns:
             Union[bool, bytearray]: False if there's an error, otherwise returns bytearray payload
         """
         try:
-            import asyncio
-            
-            def process_image_sync():
-                with PilImage.open(file_path) as img:
-                    # Convert to RGB to ensure compatibility and drop some metadata
-                    img = img.convert("RGB")
-                    
-                    if img.size != (pixel_size, pixel_size):
-                        img = img.resize(
-                            (pixel_size, pixel_size), PilImage.LANCZOS
-                        )
-                    
-                    # Strip metadata by clearing info
-                    img.info = {}
-                    
-                    png_buffer = io.BytesIO()
-                    # Save with optimize=True to further reduce size
-                    img.save(png_buffer, format="PNG", optimize=True)
-                    png_buffer.seek(0)
-                    return png_buffer.getvalue()
-
-            png_bytes = await asyncio.to_thread(process_image_sync)
-            data = self._createPayloads(png_bytes)
-            
-            if self.conn:
-                await self.conn.connect()
-                await self.conn.send(data=data)
-            return data
+            frame = await self.conn.run_cpu_job(
+                prepare_frame, file_path, pixel_size, colors, dither
+            )
+            return await self._uploadPrepared(frame)
         except BaseException as error:
             self.logging.error(f"could not upload processed image: {error}")
             return False
+
+    async def uploadFrame(
+        self,
+        frame: PilImage.Image,
+        pixel_size: int = 32,
+        colors: Optional[int] = None,
+        dither: Optional[str] = None,
+    ) -> Union[bool, bytearray]:
+        """Uploads an in-memory image, e.g. a rendered display face.
+
+        Args:
+            frame (PilImage.Image): image to upload
+            pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+            colors (Optional[int], optional): quantize to a palette of this many colors (photos). Defaults to None.
+            dither (Optional[str], optional): "ordered" or "floyd_steinberg" when quantizing. Defaults to None.
+
+        Returns:
+            Union[bool, bytearray]: False if there's an error, otherwise returns bytearray payload
+        """
+        try:
+            data = await self.prepareFrame(frame, pixel_size, colors, dither)
+            await self._sendChunks(data)
+            return data
+        except BaseException as error:
+            self.logging.error(f"could not upload frame: {error}")
+            return False
+
+    async def prepareFrame(
+        self,
+        frame: PilImage.Image,
+        pixel_size: int = 32,
+        colors: Optional[int] = None,
+        dither: Optional[str] = None,
+    ) -> Tuple[bytes, ...]:
+        """Encodes an in-memory image into framed payloads without sending them.
+
+        Use this to prepare several frames before playing them back with
+        sendPayloads, e.g. for animations that must keep a steady cadence.
+
+        Args:
+            frame (PilImage.Image): image to encode
+            pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+            colors (Optional[int], optional): quantize to a palette of this many colors (photos). Defaults to None.
+            dither (Optional[str], optional): "ordered" or "floyd_steinberg" when quantizing. Defaults to None.
+
+        Returns:
+            Tuple[bytes, ...]: the framed payloads, ready for sendPayloads
+        """
+        if colors or frame.mode != "RGB" or frame.size != (pixel_size, pixel_size):
+            frame = await self.conn.run_cpu_job(
+                prepare_frame, frame, pixel_size, colors, dither
+            )
+        return await self._encodePrepared(frame)
+
+    def framePNG(self, png_data: bytes) -> Tuple[bytes, ...]:
+        """Frames a PNG that was already encoded for the device, e.g. in a worker process.
+
+        Args:
+            png_data (bytes): PNG file contents
+
+        Returns:
+            Tuple[bytes, ...]: the framed payloads, ready for sendPayloads
+        """
+        return tuple(bytes(chunk) for chunk in self._createPayloads(png_data))
+
+    async def sendPayloads(self, payloads: Tuple[bytes, ...]) -> bool:
+        """Sends payloads prepared by prepareFrame to the device.
+
+        Args:
+            payloads (Tuple[bytes, ...]): framed payloads
+
+        Returns:
+            bool: False if there's an error, otherwise True
+        """
+        try:
+            await self._sendChunks(payloads)
+            return True
+        except BaseException as error:
+            self.logging.error(f"could not send the image: {error}")
+            return False
+
+    async def _uploadPrepared(self, frame: PilImage.Image) -> Tuple[bytes, ...]:
+        """Sends a device-sized RGB frame, reusing the payload of an identical earlier frame.
+
+        Args:
+            frame (PilImage.Image): RGB or palette image at the device resolution
+
+        Returns:
+            Tuple[bytes, ...]: the framed payloads that were sent
+        """
+        data = await self._encodePrepared(frame)
+        await self._sendChunks(data)
+        return data
+
+    async def _sendChunks(self, chunks: Tuple[bytes, ...]) -> None:
+        """Sends framed payloads, waiting for the device to acknowledge each."""
+        if self.conn:
+            await self.conn.connect()
+            for chunk in chunks:
+                await self.conn.send(data=chunk, response=True)
+
+    async def _encodePrepared(
+        self, frame: PilImage.Image, png_data: Optional[bytes] = None
+    ) -> Tuple[bytes, ...]:
+        """Returns the framed payloads of a device-sized frame, cached by content.
+
+        Args:
+            frame (PilImage.Image): RGB or palette image at the device resolution
+            png_data (Optional[bytes], optional): the frame's PNG if it was already encoded elsewhere; framed and cached instead of encoding again. Defaults to None.
+
+        Returns:
+            Tuple[bytes, ...]: the framed payloads
+        """
+        digest = hashlib.blake2b(frame.tobytes(), digest_size=16)
+        if frame.mode == "P":
+            digest.update(bytes(frame.getpalette()))
+        key = (frame.size, frame.mode, digest.digest())
+        data = self.payload_cache.get(key)
+        if data is MISSING:
+            if png_data is None:
+                png_data = await self.conn.run_cpu_job(encode_frame, frame)
+            data = self.framePNG(png_data)
+            self.payload_cache.put(key, data)
+        return data
+
+
+def prepare_frame(
+    source: Union[str, PilImage.Image],
+    pixel_size: int = 32,
+    colors: Optional[int] = None,
+    dither: Optional[str] = None,
+) -> PilImage.Image:
+    """Converts an image file or PIL image into a frame at the device size.
+
+    Module level so it can run in a worker process.
+
+    Args:
+        source (Union[str, PilImage.Image]): path to the image file or an image
+        pixel_size (int, optional): amount of pixels (either 16 or 32 makes sense). Defaults to 32.
+        colors (Optional[int], optional): quantize to a palette of this many colors. Defaults to None.
+        dither (Optional[str], optional): "ordered" or "floyd_steinberg" when quantizing. Defaults to None.
+
+    Returns:
+        PilImage.Image: RGB (or "P" when quantized) image of pixel_size x pixel_size
+    """
+    if isinstance(source, str):
+        with PilImage.open(source) as img:
+            # Decode large JPEGs directly at a reduced scale
+            img.draft("RGB", (pixel_size, pixel_size))
+            # Convert to RGB to ensure compatibility and drop some metadata
+            img = img.convert("RGB")
+    else:
+        img = source.convert("RGB")
+
+    if img.size != (pixel_size, pixel_size):
+        # reducing_gap box-reduces big sources before LANCZOS
+        img = img.resize(
+            (pixel_size, pixel_size), PilImage.LANCZOS, reducing_gap=2.0
+        )
+    if colors:
+        img = quantize(img, min(colors, 256), dither)
+    return img
+
+
+def encode_frame(frame: PilImage.Image) -> bytes:
+    """Encodes a prepared frame as the smallest PNG of a few encoder settings.
+
+    Frames with few colors are also tried as exact palette PNGs. Every
+    candidate is saved with each setting of ENCODER_LADDER and the smallest
+    output wins: at panel resolution a save takes well under a millisecond,
+    far less than the link time a single saved byte is worth, so all of
+    them are always tried. Module level so it can run in a worker process.
+
+    Args:
+        frame (PilImage.Image): RGB or palette image at the device resolution
+
+    Returns:
+        bytes: PNG file contents
+    """
+    # Strip metadata by clearing info
+    frame.info = {}
+
+    candidates = [frame]
+    colors = frame.getcolors(256) if frame.mode == "RGB" else None
+    if colors is not None:
+        indexed = frame.convert("P", palette=PilImage.ADAPTIVE, colors=len(colors))
+        # only lossless palettes are acceptable
+        if indexed.convert("RGB").tobytes() == frame.tobytes():
+            candidates.append(indexed)
+
+    best = None
+    for img in candidates:
+        for options in ENCODER_LADDER:
+            png_buffer = io.BytesIO()
+            img.save(png_buffer, format="PNG", **options)
+            if best is None or png_buffer.tell() < len(best):
+                best = png_buffer.getvalue()
+    return best
+
+
+def validatePNG(png_data: bytes) -> None:
+    """Checks the PNG signature, chunk lengths and CRCs before anything is sent.
+
+    Args:
+        png_data (bytes): data of the png file
+
+    Raises:
+        ValueError: if the data is truncated, corrupt or too large to frame
+    """
+    if len(png_data) > 0xFFFFFFFF:
+        raise ValueError(f"png of {len(png_data)} bytes is too large")
+    if png_data[:8] != PNG_SIGNATURE:
+        raise ValueError("missing png signature")
+    offset = 8
+    while offset + 12 <= len(png_data):
+        length, chunk_type = struct.unpack_from(">I4s", png_data, offset)
+        end = offset + 8 + length
+        if end + 4 > len(png_data):
+            raise ValueError(f"truncated png chunk {chunk_type!r}")
+        (crc,) = struct.unpack_from(">I", png_data, end)
+        if zlib.crc32(png_data[offset + 4 : end]) != crc:
+            raise ValueError(f"bad crc in png chunk {chunk_type!r}")
+        if chunk_type == b"IEND":
+            return
+        offset = end + 4
+    raise ValueError("png has no IEND chunk")
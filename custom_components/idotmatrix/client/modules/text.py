@@ -1,7 +1,9 @@
 from ..connectionManager import ConnectionManager
+from ..fontLoader import load_font
 import logging
 from PIL import Image, ImageDraw, ImageFont
-from typing import Tuple, Optional, Union
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional
+import itertools
 import zlib
 
 
@@ -32,8 +34,97 @@ class Text:
         compact_mode: bool = False,
         spacing: int = 0,
         proportional: bool = True,
-    ) -> Union[bool, bytearray]:
-        
+    ) -> bool:
+        """Renders the text and sends it to the device as a scrolling marquee.
+
+        Returns:
+            bool: False if there's an error, otherwise True
+        """
+        try:
+            packets = self._iterPackets(
+                text, font_size, font_path, text_mode, speed, text_color_mode,
+                text_color, text_bg_mode, text_bg_color, compact_mode, spacing,
+                proportional,
+            )
+            if self.conn:
+                await self.conn.connect()
+            # Glyph blocks are rendered and framed one chunk at a time off the
+            # event loop, so long marquees never sit in memory as a whole
+            while (chunk := await self.conn.run_job(next, packets, None)) is not None:
+                if self.conn:
+                    await self.conn.send(data=chunk, response=True)
+            return True
+        except BaseException as error:
+            self.logging.error(f"could send the text to the device: {error}")
+            return False
+
+    def buildPackets(
+        self,
+        text: str,
+        font_size: int = 16,
+        font_path: Optional[str] = None,
+        text_mode: int = 1,
+        speed: int = 95,
+        text_color_mode: int = 1,
+        text_color: Tuple[int, int, int] = (255, 0, 0),
+        text_bg_mode: int = 0,
+        text_bg_color: Tuple[int, int, int] = (0, 255, 0),
+        compact_mode: bool = False,
+        spacing: int = 0,
+        proportional: bool = True,
+    ) -> List[bytes]:
+        """Renders the framed chunks of a text upload ahead of time (blocking).
+
+        Use this to prepare several texts before playing them back with
+        sendPackets, e.g. for animations that must keep a steady cadence.
+
+        Returns:
+            List[bytes]: framed chunks, ready for sendPackets
+        """
+        return [
+            bytes(chunk)
+            for chunk in self._iterPackets(
+                text, font_size, font_path, text_mode, speed, text_color_mode,
+                text_color, text_bg_mode, text_bg_color, compact_mode, spacing,
+                proportional,
+            )
+        ]
+
+    async def sendPackets(self, packets: Iterable[bytes]) -> bool:
+        """Sends chunks prepared by buildPackets to the device.
+
+        Args:
+            packets (Iterable[bytes]): framed chunks
+
+        Returns:
+            bool: False if there's an error, otherwise True
+        """
+        try:
+            if self.conn:
+                await self.conn.connect()
+                for chunk in packets:
+                    await self.conn.send(data=chunk, response=True)
+            return True
+        except BaseException as error:
+            self.logging.error(f"could send the text to the device: {error}")
+            return False
+
+    def _iterPackets(
+        self,
+        text: str,
+        font_size: int,
+        font_path: Optional[str],
+        text_mode: int,
+        speed: int,
+        text_color_mode: int,
+        text_color: Tuple[int, int, int],
+        text_bg_mode: int,
+        text_bg_color: Tuple[int, int, int],
+        compact_mode: bool,
+        spacing: int,
+        proportional: bool,
+    ) -> Iterator[bytearray]:
+        """Yields the framed chunks of a text, loading the font on first use."""
         # Determine layout based on mode
         if compact_mode:
             image_width = 8
@@ -44,63 +135,31 @@ class Text:
             image_height = 32
             separator = b"\x05\xff\xff\xff"
 
-        try:
-            if self.conn and self.conn.hass:
-                text_bitmaps = await self.conn.hass.async_add_executor_job(
-                    self._StringToBitmaps,
-                    text,
-                    font_path,
-                    font_size,
-                    image_width,
-                    image_height,
-                    separator,
-                    spacing,
-                    proportional,
-                )
-            else:
-                text_bitmaps = self._StringToBitmaps(
-                    text=text,
-                    font_size=font_size,
-                    font_path=font_path,
-                    image_width=image_width,
-                    image_height=image_height,
-                    separator=separator,
-                    spacing=spacing,
-                    proportional=proportional,
-                )
-
-            data = self._buildStringPacket(
-                text_mode=text_mode,
-                speed=speed,
-                text_color_mode=text_color_mode,
-                text_color=text_color,
-                text_bg_mode=text_bg_mode,
-                text_bg_color=text_bg_color,
-                text_bitmaps=text_bitmaps,
-                separator=separator
-            )
-            if self.conn:
-                await self.conn.connect()
-                await self.conn.send(data=data)
-            return data
-        except BaseException as error:
-            self.logging.error(f"could send the text to the device: {error}")
-            return False
+        font = self._loadFont(font_path, font_size)
+        yield from self._iterStringPackets(
+            bitmaps=lambda: self._iterBitmaps(
+                text, font, image_width, image_height, separator, spacing, proportional
+            ),
+            num_chars=self._countBlocks(text, font, image_width, spacing, proportional),
+            text_mode=text_mode,
+            speed=speed,
+            text_color_mode=text_color_mode,
+            text_color=text_color,
+            text_bg_mode=text_bg_mode,
+            text_bg_color=text_bg_color,
+        )
 
-    def _buildStringPacket(
+    def _buildTextMetadata(
         self,
-        text_bitmaps: bytearray,
+        num_chars: int,
         text_mode: int = 1,
         speed: int = 95,
         text_color_mode: int = 1,
         text_color: Tuple[int, int, int] = (255, 0, 0),
         text_bg_mode: int = 0,
         text_bg_color: Tuple[int, int, int] = (0, 255, 0),
-        separator: bytes = b"\x05\xff\xff\xff"
     ) -> bytearray:
-        """Constructs a packet with the settings and bitmaps for iDotMatrix devices."""
-        num_chars = text_bitmaps.count(separator)
-
+        """Constructs the settings block that precedes the bitmaps."""
         text_metadata = bytearray(
             [
                 0,
@@ -116,16 +175,46 @@ class Text:
             ]
         )
         text_metadata[:2] = num_chars.to_bytes(2, byteorder="little")
+        return text_metadata
+
+    def _iterStringPackets(
+        self,
+        bitmaps: Callable[[], Iterable[bytes]],
+        num_chars: int,
+        chunk_size: int = 4096,
+        **settings,
+    ) -> Iterator[bytearray]:
+        """Yields the framed chunks of a text upload.
+
+        Like GIF uploads, the packet (settings followed by the glyph blocks) is
+        split into chunks that each carry a header with the chunk length, a
+        0/2 first/continuation flag and the total length and CRC. bitmaps is
+        called twice: once to stream length and CRC into the header, then to
+        fill the chunks, so at most one chunk is held in memory.
+
+        Args:
+            bitmaps (Callable[[], Iterable[bytes]]): returns a fresh iterator of glyph blocks
+            num_chars (int): number of glyph blocks
+            chunk_size (int): size of a chunk
+            **settings: text_mode, speed and color settings for _buildTextMetadata
 
-        packet = text_metadata + text_bitmaps
+        Returns:
+            Iterator[bytearray]: framed chunks, ready to send
+        """
+        text_metadata = self._buildTextMetadata(num_chars, **settings)
+        packet_len = len(text_metadata)
+        crc = zlib.crc32(text_metadata)
+        for block in bitmaps():
+            packet_len += len(block)
+            crc = zlib.crc32(block, crc)
 
         header = bytearray(
             [
                 0,
-                0,  # total_len placeholder
+                0,  # chunk length placeholder
                 3,
                 0,
-                0,  # Static header values
+                0,  # first/continuation flag
                 0,
                 0,
                 0,
@@ -139,19 +228,24 @@ class Text:
                 12,  # Static footer values
             ]
         )
-        total_len = len(packet) + len(header)
-        header[:2] = total_len.to_bytes(2, byteorder="little")
-        header[5:9] = len(packet).to_bytes(4, byteorder="little")
-        header[9:13] = zlib.crc32(packet).to_bytes(4, byteorder="little")
+        header[5:9] = packet_len.to_bytes(4, byteorder="little")
+        header[9:13] = crc.to_bytes(4, byteorder="little")
 
-        return header + packet
+        buffer = bytearray(text_metadata)
+        index = 0
+        for block in itertools.chain(bitmaps(), [b""]):
+            buffer += block
+            while len(buffer) >= chunk_size or (not block and buffer):
+                chunk = buffer[:chunk_size]
+                del buffer[:chunk_size]
+                # starting from the second chunk, set the header to 2
+                header[4] = 2 if index > 0 else 0
+                header[0:2] = (len(chunk) + len(header)).to_bytes(2, byteorder="little")
+                index += 1
+                yield header + chunk
 
-    def _StringToBitmaps(
-        self, text: str, font_path: Optional[str] = None, font_size: Optional[int] = 20,
-        image_width: int = 16, image_height: int = 32, separator: bytes = b"\x05\xff\xff\xff",
-        spacing: int = 0, proportional: bool = True
-    ) -> bytearray:
-        """Converts text to bitmap images suitable for iDotMatrix devices."""
+    def _loadFont(self, font_path: Optional[str] = None, font_size: Optional[int] = 20):
+        """Resolves and loads the font, falling back to the bundled default."""
         import os
         base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         fonts_dir = os.path.join(base_path, "fonts")
@@ -173,7 +267,8 @@ class Text:
         
         if font_path:
             try:
-                font = ImageFont.truetype(font_path, font_size)
+                # BDF fonts are compiled once and loaded as non-antialiased bitmap fonts
+                return load_font(font_path, font_size)
             except Exception as exc:
                 self.logging.warning(
                     "Failed to load font %s, falling back to default: %s",
@@ -181,15 +276,48 @@ class Text:
                     exc,
                 )
                 try:
-                    font = ImageFont.truetype(
+                    return ImageFont.truetype(
                         os.path.join(fonts_dir, "Rain-DRM3.otf"), font_size
                     )
                 except Exception:
-                    font = ImageFont.load_default()
-        else:
-            font = ImageFont.load_default()
-        byte_stream = bytearray()
-        
+                    pass
+        return ImageFont.load_default()
+
+    def _layoutChars(self, text: str, font, spacing: int) -> List[Tuple[str, int, int, int, int]]:
+        """Places characters on a proportional line.
+
+        Returns:
+            List[Tuple[str, int, int, int, int]]: (char, x, left, right, height) per character
+        """
+        draw = ImageDraw.Draw(Image.new("1", (1, 1), 0))
+        layout = []
+        current_x = 0
+        for char in text:
+            bbox = draw.textbbox((0, 0), text=char, font=font)
+            layout.append((char, current_x, bbox[0], bbox[2], bbox[3] - bbox[1]))
+            current_x += bbox[2] - bbox[0] + spacing
+        return layout
+
+    def _countBlocks(
+        self, text: str, font, image_width: int = 16, spacing: int = 0, proportional: bool = True
+    ) -> int:
+        """Returns how many glyph blocks _iterBitmaps will yield."""
+        if not proportional:
+            return len(text)
+        layout = self._layoutChars(text, font, spacing)
+        total_width = sum(right - left + spacing for _, _, left, right, _ in layout)
+        return -(-max(total_width, image_width) // image_width)
+
+    def _iterBitmaps(
+        self, text: str, font, image_width: int = 16, image_height: int = 32,
+        separator: bytes = b"\x05\xff\xff\xff", spacing: int = 0, proportional: bool = True
+    ) -> Iterator[bytes]:
+        """Yields the separator-prefixed bitmap of each display block.
+
+        Proportional text is laid out once and each block is drawn on its own
+        small canvas from the characters overlapping it, instead of slicing
+        one canvas as wide as the whole text.
+        """
         if not proportional:
             # Legacy Fixed Width Logic
             for char in text:
@@ -200,88 +328,51 @@ class Text:
                 text_x = (image_width - text_width) // 2
                 text_y = (image_height - text_height) // 2
                 draw.text((text_x, text_y), char, fill=1, font=font)
-                
-                bitmap = bytearray()
-                for y in range(image_height):
-                    for x in range(image_width):
-                        if x % 8 == 0:
-                            byte = 0
-                        pixel = image.getpixel((x, y))
-                        byte |= (pixel & 1) << (x % 8)
-                        if x % 8 == 7 or x == image_width - 1:
-                            bitmap.append(byte)
-                byte_stream.extend(separator + bitmap)
-            return byte_stream
-            
-        else:
-            # Proportional Logic (Slicing)
-            # 1. Measure total width with spacing
-            total_width = 0
-            # To handle spacing correctly, we draw tightly then add spacing?
-            # Or use draw.text callback?
-            # For simplicity, we draw the whole string at once to let PIL handle basic kerning,
-            # then we add extra spacing if requested by iterating chars?
-            # User wants "0 to no space", which implies they might want TIGHTER than PIL defaults?
-            # But PIL is standard. Let's assume proportional=True means "Natural".
-            # And `spacing` adds EXTRA pixels.
-            
-            # Draw char by char to allow custom spacing
-            char_images = []
-            max_h = image_height
-            
-            for char in text:
-                 # get size
-                 # Use dummy draw
-                 dummy = Image.new("1", (1, 1), 0)
-                 d = ImageDraw.Draw(dummy)
-                 bbox = d.textbbox((0, 0), text=char, font=font)
-                 w = bbox[2] - bbox[0]
-                 # h = bbox[3] - bbox[1] # ignore height, use max
-                 char_images.append((char, w))
-                 
-            total_width = sum([w + spacing for char, w in char_images])
-            # Ensure width is at least one block?
-            if total_width < image_width:
-                total_width = image_width
-                
-            # Create big canvas
-            canvas = Image.new("1", (total_width, image_height), 0)
-            draw = ImageDraw.Draw(canvas)
-            
-            current_x = 0
-            for char, w in char_images:
-                # Vertically center?
-                bbox = draw.textbbox((0, 0), text=char, font=font)
-                h = bbox[3] - bbox[1]
-                y = (image_height - h) // 2
-                # Correct Y using font metrics if possible for baseline consistency, but centering per char is safer for pixel fonts
-                # Actually, standard draw.text usually handles baseline.
-                # If we center each char vertically independently, it might look jumpy.
-                # Better to use a constant Y for the whole line.
-                draw.text((current_x, y), char, fill=1, font=font)
-                current_x += w + spacing
-                
-            # Slice into chunks of image_width (16)
-            for i in range(0, total_width, image_width):
-                # crop(box) -> (left, upper, right, lower)
-                chunk = canvas.crop((i, 0, i + image_width, image_height))
-                
-                # If last chunk is narrow, pad it?
-                if chunk.size[0] < image_width:
-                    tmp = Image.new("1", (image_width, image_height), 0)
-                    tmp.paste(chunk, (0, 0))
-                    chunk = tmp
-                    
-                # Convert to bitmap
-                bitmap = bytearray()
-                for y in range(image_height):
-                    for x in range(image_width):
-                        if x % 8 == 0:
-                            byte = 0
-                        pixel = chunk.getpixel((x, y))
-                        byte |= (pixel & 1) << (x % 8)
-                        if x % 8 == 7 or x == image_width - 1:
-                            bitmap.append(byte)
-                byte_stream.extend(separator + bitmap)
-                
-            return byte_stream
+                yield separator + self._packBitmap(image)
+            return
+
+        # Proportional Logic (Slicing)
+        layout = self._layoutChars(text, font, spacing)
+        total_width = sum(right - left + spacing for _, _, left, right, _ in layout)
+        # Ensure width is at least one block
+        total_width = max(total_width, image_width)
+
+        first = 0
+        for block_x in range(0, total_width, image_width):
+            # skip characters that ended left of this block
+            while first < len(layout) and layout[first][1] + layout[first][3] <= block_x:
+                first += 1
+            block = Image.new("1", (image_width, image_height), 0)
+            draw = ImageDraw.Draw(block)
+            for char, x, left, right, height in layout[first:]:
+                if x + left >= block_x + image_width:
+                    break
+                # Vertically center each glyph, as the slicing renderer did
+                y = (image_height - height) // 2
+                draw.text((x - block_x, y), char, fill=1, font=font)
+            yield separator + self._packBitmap(block)
+
+    @staticmethod
+    def _packBitmap(image: Image.Image) -> bytes:
+        """Packs a mode "1" image into rows of LSB-first bytes."""
+        # PIL packs MSB first; the device wants the leftmost pixel in bit 0
+        return image.tobytes().translate(_REVERSED_BITS)
+
+    def _StringToBitmaps(
+        self, text: str, font_path: Optional[str] = None, font_size: Optional[int] = 20,
+        image_width: int = 16, image_height: int = 32, separator: bytes = b"\x05\xff\xff\xff",
+        spacing: int = 0, proportional: bool = True
+    ) -> bytearray:
+        """Converts text to bitmap images suitable for iDotMatrix devices."""
+        font = self._loadFont(font_path, font_size)
+        return bytearray(
+            b"".join(
+                self._iterBitmaps(
+                    text, font, image_width, image_height, separator, spacing, proportional
+                )
+            )
+        )
+
+
+# Byte lookup table reversing the bit order
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
@@ -0,0 +1,160 @@
+"""Palette quantization and dithering for photo-like frames.
+
+Everything here is vectorized with NumPy and free of Home Assistant state,
+so it can run in the render executor or a worker process.
+"""
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image
+
+DITHER_ORDERED = "ordered"
+DITHER_FLOYD_STEINBERG = "floyd_steinberg"
+
+METHOD_KMEANS = "kmeans"
+METHOD_MEDIAN_CUT = "median_cut"
+
+# k-means trains on at most this many pixels (randomly sampled)
+KMEANS_SAMPLES = 16384
+KMEANS_ITERATIONS = 8
+# Pixels mapped per distance-matrix block, bounds temporary memory
+_MAP_BLOCK = 8192
+
+# 4x4 Bayer matrix, normalized to [-0.5, 0.5)
+_BAYER_4 = (
+    np.array(
+        [[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]],
+        dtype=np.float32,
+    )
+    / 16.0
+    - 0.5
+)
+
+
+def quantize(
+    img: Image.Image,
+    colors: int = 64,
+    dither: str | None = None,
+    method: str = METHOD_KMEANS,
+) -> Image.Image:
+    """Reduce an image to a "P" image with at most ``colors`` entries.
+
+    Images that already use no more than ``colors`` colors are converted
+    losslessly. ``dither`` is None, ``"ordered"`` or ``"floyd_steinberg"``.
+    """
+    rgb = np.asarray(img.convert("RGB"), dtype=np.uint8)
+    height, width, _ = rgb.shape
+    pixels = rgb.reshape(-1, 3)
+
+    unique = np.unique(pixels, axis=0)
+    if len(unique) <= colors:
+        palette = unique
+        dither = None
+    elif method == METHOD_MEDIAN_CUT:
+        palette = median_cut(pixels, colors)
+    else:
+        palette = kmeans(pixels, colors)
+
+    if dither == DITHER_FLOYD_STEINBERG:
+        indices = _floyd_steinberg(rgb.astype(np.float32), palette)
+    elif dither == DITHER_ORDERED:
+        indices = _ordered(rgb.astype(np.float32), palette)
+    else:
+        indices = map_to_palette(pixels.astype(np.float32), palette).reshape(height, width)
+
+    out = Image.frombytes("P", (width, height), indices.astype(np.uint8).tobytes())
+    out.putpalette(palette.astype(np.uint8).tobytes())
+    return out
+
+
+def median_cut(pixels: np.ndarray, colors: int) -> np.ndarray:
+    """Return a palette by repeatedly splitting the box with the widest spread."""
+    boxes = [pixels]
+    while len(boxes) < colors:
+        # spread on the widest channel, weighted by population
+        scores = [
+            int(np.ptp(box, axis=0).max()) * len(box) if len(box) > 1 else -1
+            for box in boxes
+        ]
+        index = int(np.argmax(scores))
+        if scores[index] <= 0:
+            break
+        box = boxes.pop(index)
+        channel = int(np.argmax(np.ptp(box, axis=0)))
+        order = np.argsort(box[:, channel], kind="stable")
+        half = len(box) // 2
+        boxes += [box[order[:half]], box[order[half:]]]
+    return np.array([box.mean(axis=0) for box in boxes]).round().astype(np.uint8)
+
+
+def kmeans(pixels: np.ndarray, colors: int, iterations: int = KMEANS_ITERATIONS) -> np.ndarray:
+    """Return a palette refined with Lloyd's k-means, seeded by median cut."""
+    samples = pixels
+    if len(samples) > KMEANS_SAMPLES:
+        rng = np.random.default_rng(0)
+        samples = samples[rng.choice(len(samples), KMEANS_SAMPLES, replace=False)]
+    samples = samples.astype(np.float32)
+
+    centers = median_cut(samples, colors).astype(np.float32)
+    for _ in range(iterations):
+        labels = map_to_palette(samples, centers)
+        counts = np.bincount(labels, minlength=len(centers)).astype(np.float32)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, samples)
+        used = counts > 0
+        updated = centers.copy()
+        updated[used] = sums[used] / counts[used, None]
+        if np.allclose(updated, centers, atol=0.5):
+            centers = updated
+            break
+        centers = updated
+    return centers.round().clip(0, 255).astype(np.uint8)
+
+
+def map_to_palette(pixels: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """Return the index of the nearest palette entry for each pixel."""
+    palette = palette.astype(np.float32)
+    palette_norm = (palette**2).sum(axis=1)
+    indices = np.empty(len(pixels), dtype=np.intp)
+    for start in range(0, len(pixels), _MAP_BLOCK):
+        block = pixels[start : start + _MAP_BLOCK]
+        # |x - p|^2 without the per-pixel constant |x|^2
+        distances = palette_norm - 2.0 * block @ palette.T
+        indices[start : start + _MAP_BLOCK] = distances.argmin(axis=1)
+    return indices
+
+
+def _ordered(rgb: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """Ordered (Bayer) dithering scaled to the palette's typical spacing."""
+    height, width, _ = rgb.shape
+    palette_f = palette.astype(np.float32)
+    distances = np.sqrt(((palette_f[:, None] - palette_f[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(distances, np.inf)
+    # median distance to the nearest other entry, per channel
+    spread = float(np.median(distances.min(axis=1))) / np.sqrt(3)
+    threshold = np.tile(_BAYER_4, (height // 4 + 1, width // 4 + 1))[:height, :width]
+    biased = np.clip(rgb + threshold[..., None] * spread, 0, 255)
+    return map_to_palette(biased.reshape(-1, 3), palette).reshape(height, width)
+
+
+def _floyd_steinberg(rgb: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """Floyd-Steinberg error diffusion (sequential per pixel, vectorized per lookup)."""
+    height, width, _ = rgb.shape
+    palette_f = palette.astype(np.float32)
+    work = rgb.copy()
+    indices = np.empty((height, width), dtype=np.intp)
+    for y in range(height):
+        for x in range(width):
+            old = np.clip(work[y, x], 0, 255)
+            index = int(((palette_f - old) ** 2).sum(axis=1).argmin())
+            indices[y, x] = index
+            error = old - palette_f[index]
+            if x + 1 < width:
+                work[y, x + 1] += error * (7 / 16)
+            if y + 1 < height:
+                if x > 0:
+                    work[y + 1, x - 1] += error * (3 / 16)
+                work[y + 1, x] += error * (5 / 16)
+                if x + 1 < width:
+                    work[y + 1, x + 1] += error * (1 / 16)
+    return indices
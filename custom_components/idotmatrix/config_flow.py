@@ -17,6 +17,7 @@ from homeassistant.data_entry_flow import FlowResult
 
 from .const import (
     CONF_DISPLAY_MODE,
+    CONF_PROCESS_POOL,
     DEFAULT_NAME,
     DISPLAY_MODE_DESIGN,
     DISPLAY_MODE_OPTIONS,
@@ -129,11 +130,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_create_entry(title="", data=user_input)
 
         current = self.config_entry.options.get(CONF_DISPLAY_MODE, DISPLAY_MODE_DESIGN)
+        process_pool = self.config_entry.options.get(CONF_PROCESS_POOL, False)
         schema = vol.Schema(
             {
                 vol.Required(CONF_DISPLAY_MODE, default=current): vol.In(
                     DISPLAY_MODE_OPTIONS
-                )
+                ),
+                # Render in worker processes (for installations with many panels)
+                vol.Required(CONF_PROCESS_POOL, default=process_pool): bool,
             }
         )
 
@@ -14,6 +14,7 @@ STORAGE_KEY_PREFIX = "idotmatrix_settings_"
 # New Constants for Display Face
 CONF_DISPLAY_FACE = "display_face"
 CONF_DISPLAY_MODE = "display_mode"
+CONF_PROCESS_POOL = "process_pool"
 
 DISPLAY_MODE_TEXT = "text"
 DISPLAY_MODE_DESIGN = "design"
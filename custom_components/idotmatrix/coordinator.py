@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import hashlib
 import re
 from datetime import timedelta
 
@@ -12,28 +13,52 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_change,
+)
 
 from .const import DOMAIN, CONF_DISPLAY_MODE, DISPLAY_MODE_DESIGN, DISPLAY_MODE_TEXT
 from .client.connectionManager import ConnectionManager
 from .client.modules.text import Text
 from .client.modules.image import Image as IDMImage
+from .client.modules.gif import Gif
+from .client.modules.graffiti import Graffiti, buildPixelPackets
 from .client.modules.clock import Clock
+from .client.modules.common import Common
+from . import planner, render
+from .client.cache import LRUCache, MISSING
+from .client.quantize import DITHER_FLOYD_STEINBERG, DITHER_ORDERED
+from .mdi import get_mdi_icons
+from .iconify import get_iconify_icons, is_iconify_ref, svg_to_png
+from .http_cache import get_http_cache
+from .executor import get_render_executor
 
 
 from homeassistant.helpers import template
 from homeassistant.util import dt as dt_util
 
 import os
-import tempfile
-import io
-from PIL import Image, ImageDraw, ImageFont
+from urllib.parse import unquote
+import numpy as np
+from PIL import Image
 
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-MDI_META_URL = "https://raw.githubusercontent.com/Templarian/MaterialDesign/master/meta.json"
-MDI_FONT_URL = "https://raw.githubusercontent.com/Templarian/MaterialDesign-Webfont/master/fonts/materialdesignicons-webfont.ttf"
+# Icon masks are tiny ("L" mode, <= 64x64), so 1 MiB holds several hundred
+ICON_CACHE_MAX_BYTES = 1024 * 1024
+ICON_CACHE_NEGATIVE_TTL = 300.0
+# Rasterized icons are rebuilt after this, going through the HTTP cache again
+ICON_CACHE_TTL = 3600.0
+# Decoded image-layer tiles (RGBA, 64x64 is 16 KiB)
+IMAGE_CACHE_MAX_BYTES = 4 * 1024 * 1024
+# The panel's own clock drifts; re-sync it at least this often
+NATIVE_CLOCK_RESYNC_INTERVAL = timedelta(days=1)
+# Static texts whose cheapest protocol is remembered, see _async_show_static_text
+TEXT_PLAN_CACHE_ENTRIES = 64
+# Upper bound for fetching any single icon or image while rendering a face
+ASSET_FETCH_TIMEOUT = 5.0
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,6 +68,94 @@ STORAGE_KEY_PREFIX = "idotmatrix_settings_"
 
 # Regex to extract entity IDs from Jinja templates
 ENTITY_REGEX = re.compile(r"states\(['\"]([a-z_]+\.[a-z0-9_]+)['\"]\)")
+# A text layer that only shows the current time, e.g. {{ now().strftime('%H:%M') }}
+CLOCK_TEMPLATE_REGEX = re.compile(
+    r"^\s*\{\{\s*now\(\)\.strftime\(\s*(['\"])(?P<format>[^'\"]+)\1\s*\)\s*\}\}\s*$"
+)
+# strftime formats the panel's own clock can show, mapped to hour24
+NATIVE_CLOCK_FORMATS = {
+    "%H:%M": True,
+    "%-H:%M": True,
+    "%I:%M": False,
+    "%-I:%M": False,
+    "%l:%M": False,
+}
+# Layer keys that add something the native clock can't draw
+_NON_CLOCK_LAYER_KEYS = ("entity", "icon", "icon_template", "condition_template", "image_path")
+# Accepted palette options of a face config
+PALETTE_COLORS_MIN = 2
+PALETTE_COLORS_MAX = 256
+DITHER_MODES = (None, DITHER_ORDERED, DITHER_FLOYD_STEINBERG)
+
+
+def _safe_join(base: str, rel_path: str) -> str | None:
+    """Join a relative path onto base, refusing paths that escape it."""
+    base = os.path.realpath(base)
+    path = os.path.realpath(os.path.join(base, rel_path))
+    if os.path.commonpath([base, path]) != base:
+        return None
+    return path
+
+
+def _read_file(path: str) -> bytes | None:
+    """Read a file, returning None if it doesn't exist."""
+    try:
+        with open(path, "rb") as fp:
+            return fp.read()
+    except FileNotFoundError:
+        return None
+
+
+def _changed_pixels(shown: np.ndarray, pixels: np.ndarray) -> np.ndarray:
+    """Return an (n, 5) array of x, y, r, g, b for the pixels that differ."""
+    ys, xs = np.nonzero((shown != pixels).any(axis=2))
+    return np.column_stack((xs, ys, pixels[ys, xs]))
+
+
+def _palette_options(face_config: dict) -> tuple[int | None, str | None]:
+    """Validate a face's palette_colors and dither, dropping invalid values.
+
+    palette_colors may arrive as a string from YAML or the card; it is
+    coerced to an int in PALETTE_COLORS_MIN..PALETTE_COLORS_MAX.
+    """
+    colors = face_config.get("palette_colors")
+    if colors is not None:
+        try:
+            if isinstance(colors, bool) or int(colors) != float(colors):
+                raise ValueError
+            colors = int(colors)
+        except (TypeError, ValueError):
+            colors = -1
+        if not PALETTE_COLORS_MIN <= colors <= PALETTE_COLORS_MAX:
+            _LOGGER.warning(
+                "[iDotMatrix] Ignoring palette_colors %r, expected an integer from %s to %s",
+                face_config.get("palette_colors"),
+                PALETTE_COLORS_MIN,
+                PALETTE_COLORS_MAX,
+            )
+            colors = None
+
+    dither = face_config.get("dither") or None
+    if dither not in DITHER_MODES:
+        _LOGGER.warning(
+            "[iDotMatrix] Ignoring dither %r, expected one of %s",
+            dither,
+            ", ".join(mode for mode in DITHER_MODES if mode),
+        )
+        dither = None
+    return colors, dither
+
+
+def _stat_image(candidates: list[str]) -> tuple[str, tuple[int, int], str] | None:
+    """Return (path, (mtime_ns, size), path) for the first existing file."""
+    for path in candidates:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return path, (stat.st_mtime_ns, stat.st_size), path
+    _LOGGER.error("Image file not found: %s", candidates[0])
+    return None
 
 
 class IDotMatrixCoordinator(DataUpdateCoordinator):
@@ -61,13 +174,22 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
         self._entity_unsubs: list = []  # Entity state change unsubscribe callbacks
         self.display_mode = entry.options.get(CONF_DISPLAY_MODE, DISPLAY_MODE_DESIGN)
         self._svg_error_logged = False
-        self._icon_cache: dict[tuple[str, int], Image.Image | None] = {}
-        self._mdi_meta: dict[str, str] | None = None
-        self._mdi_font_bytes: bytes | None = None
-        self._mdi_fonts: dict[int, ImageFont.FreeTypeFont] = {}
-        self._mdi_lock = asyncio.Lock()
-        self._mdi_error_logged = False
-        self._mdi_unknown_icons: set[str] = set()
+        self.icon_cache = LRUCache(
+            ICON_CACHE_MAX_BYTES, negative_ttl=ICON_CACHE_NEGATIVE_TTL, ttl=ICON_CACHE_TTL
+        )
+        self.image_cache = LRUCache(IMAGE_CACHE_MAX_BYTES)
+        self.executor = get_render_executor(hass)
+        # Shadow of the frame the panel shows, valid while nothing else was sent
+        self._framebuffer: np.ndarray | None = None
+        self._framebuffer_tag = None
+        self._frame_bytes: int | None = None
+        self._frame_lock = asyncio.Lock()
+        self.frame_stats = {"unchanged": 0, "graffiti": 0, "full": 0}
+        self.last_text_plan: list[dict] = []
+        self.text_plan_cache = LRUCache(TEXT_PLAN_CACHE_ENTRIES, sizeof=lambda method: 1)
+        # (BLE client, UTC offset, synced at) of the last native clock sync
+        self._clock_sync: tuple | None = None
+        self._clock_task: asyncio.Task | None = None
         
         # Shared settings for Text entity
         self.text_settings = {
@@ -89,6 +211,7 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
             "clock_date": True,   # Show date
             "clock_format": "24h",# 12h or 24h
             "fun_text_delay": 0.4,# Fun Text delay in seconds
+            "fun_text_gif": False,# Upload Fun Text as one looping GIF
             "autosize": False,    # Auto-scale font to fit screen
             "mode": "basic",      # basic | advanced
             "layers": [],         # List of layers for advanced mode
@@ -102,6 +225,12 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
         layers = face_config.get("layers", [])
         self.text_settings["mode"] = "advanced"
         self.text_settings["layers"] = layers
+        # Optional lossy palette for photo-heavy faces
+        colors, dither = _palette_options(face_config)
+        self.text_settings["palette_colors"] = colors
+        self.text_settings["dither"] = dither
+        # Clock-only faces use the panel's built-in clock unless disabled
+        self.text_settings["native_clock"] = face_config.get("native_clock", True)
 
         self._apply_face_tracking(face_config)
         
@@ -125,6 +254,17 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
         if not layers:
             return
 
+        if self._native_clock(layers) is not None:
+            # The panel keeps time itself, nothing to re-render on sensor.time;
+            # just check every minute whether its clock needs to be set again
+            _LOGGER.info("[iDotMatrix] Clock-only face, using the native clock")
+            self._entity_unsubs.append(
+                async_track_time_change(
+                    self.hass, self._on_native_clock_check, second=5
+                )
+            )
+            return
+
         # Extract entity IDs from layers
         entities_to_track = set()
         for layer in layers:
@@ -178,16 +318,63 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
         # Schedule async update
         self.hass.async_create_task(self.async_update_device())
 
+    @callback
+    def _on_native_clock_check(self, now) -> None:
+        """Re-sync the native clock after a reconnect, a DST change or a day."""
+        settings = self.text_settings
+        if (
+            self.display_mode != DISPLAY_MODE_DESIGN
+            or settings.get("mode") != "advanced"
+            or (clock := self._native_clock(settings.get("layers", []))) is None
+        ):
+            return
+        if self._clock_task is not None and not self._clock_task.done():
+            # Still reconnecting or syncing from an earlier check
+            return
+        client, utcoffset, synced_at = self._clock_sync or (None, None, None)
+        current = ConnectionManager().client
+        if (
+            synced_at is None
+            or current is None
+            or not current.is_connected
+            or current is not client
+        ):
+            # Never synced, disconnected or a new connection: the panel may
+            # have restarted, so reconnect and restore the whole clock
+            _LOGGER.debug("[iDotMatrix] Restoring the native clock")
+            self._clock_task = self.hass.async_create_task(
+                self._async_show_native_clock(*clock)
+            )
+        elif (
+            dt_util.now().utcoffset() != utcoffset
+            or dt_util.utcnow() - synced_at >= NATIVE_CLOCK_RESYNC_INTERVAL
+        ):
+            _LOGGER.debug("[iDotMatrix] Re-syncing the native clock")
+            self._clock_task = self.hass.async_create_task(self._async_sync_clock())
 
     async def _render_face(self, layers: list, screen_size: int) -> Image.Image:
         """Render the advanced display face."""
-        # Create base canvas
-        canvas = Image.new("RGB", (screen_size, screen_size), (0, 0, 0))
-        draw = ImageDraw.Draw(canvas)
-        
-        # Load Fonts Cache (simple dict for now)
-        # We can reuse the font loading logic or abstract it
-        
+        items = self._resolve_layers(layers)
+        await self._async_fetch_assets(items)
+        return await self.executor.async_run_cpu(render.render_face, items, screen_size)
+
+    async def _async_render_face_frame(
+        self,
+        layers: list,
+        screen_size: int,
+        colors: int | None = None,
+        dither: str | None = None,
+    ) -> render.PanelFrame:
+        """Render the advanced display face, ready to send, in one worker job."""
+        items = self._resolve_layers(layers)
+        await self._async_fetch_assets(items)
+        return await self.executor.async_run_cpu(
+            render.render_face_frame, items, screen_size, colors, dither
+        )
+
+    def _resolve_layers(self, layers: list) -> list[dict]:
+        """Evaluate conditions and templates, returning the layers to draw."""
+        items = []
         for layer in layers:
             # check conditions
             if (cond_tpl := layer.get("condition_template")):
@@ -200,15 +387,10 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
                     continue
 
             l_type = layer.get("type", "text")
-            x = layer.get("x", 0)
-            y = layer.get("y", 0)
-            
+            item = {"layer": layer}
+
             if l_type == "text":
                 content = ""
-                icon_ref = layer.get("icon")
-                icon_size = int(layer.get("icon_size", 16))
-                icon_template = layer.get("icon_template")
-                
                 # Priority: content (already resolved) > entity > template
                 if layer.get("content"):
                     # Content already resolved by frontend
@@ -229,175 +411,216 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
                         content = "ERR"
                         _LOGGER.warning(f"Error evaluating text template: {e}")
 
-                if not icon_ref and icon_template:
-                    try:
-                        tpl = template.Template(icon_template, self.hass)
-                        icon_ref = tpl.async_render(parse_result=False)
-                    except Exception as e:
-                        _LOGGER.warning(f"Error evaluating icon template: {e}")
-                
-                # Render icon if present
-                if icon_ref:
-                    icon_img = await self._load_icon(icon_ref, icon_size)
-                    if icon_img:
-                        r, g, b, a = icon_img.split()
-                        color = tuple(layer.get("color", [255, 255, 255]))
-                        colored_icon = Image.new("RGB", icon_img.size, color)
-                        canvas.paste(colored_icon, (x, y), mask=a)
-
-                # Skip empty content
-                if not content:
-                    continue
-                
-                # Render Text using LAYER settings only (not global text_settings)
-                color = tuple(layer.get("color", [255, 255, 255]))
-                font_name = layer.get("font", "Rain-DRM3.otf")
-                font_size = int(layer.get("font_size", 10))
-                spacing_x = int(layer.get("spacing_x", 1))
-                spacing_y = int(layer.get("spacing_y", 1))
-                blur = int(layer.get("blur", 5))
-                
-                # Resolve font path
-                base_path = os.path.dirname(os.path.abspath(__file__))
-                fonts_dir = os.path.join(base_path, "fonts")
-                font_path = os.path.join(fonts_dir, "Rain-DRM3.otf")
-                
-                if font_name:
-                    if not os.path.isabs(font_name):
-                         potential = os.path.join(fonts_dir, font_name)
-                         if os.path.exists(potential):
-                             font_path = potential
-                    elif os.path.exists(font_name):
-                        font_path = font_name
-                        
-                try:
-                    font = ImageFont.truetype(font_path, font_size)
-                except:
-                    font = ImageFont.load_default()
-                
-                # Create separate RGBA layer for text to apply blur/sharpness
-                text_layer = Image.new("RGBA", (screen_size, screen_size), (0, 0, 0, 0))
-                text_draw = ImageDraw.Draw(text_layer)
-                
-                # Character-by-character rendering with custom spacing
-                current_x = x
-                for char in str(content):
-                    text_draw.text((current_x, y), char, font=font, fill=(255, 255, 255, 255))
-                    # Get character width
-                    try:
-                        bbox = font.getbbox(char)
-                        char_width = bbox[2] - bbox[0] if bbox else font.getlength(char)
-                    except:
-                        char_width = font_size // 2
-                    current_x += int(char_width) + spacing_x
-                
-                # Apply blur/sharpness effect (0=Sharp, 5=Normal, 10=Blur)
-                if blur < 5:
-                    # Apply sharpening via contrast enhancement on alpha channel
-                    r, g, b, a = text_layer.split()
-                    gain = 1.0 + ((5 - blur) * 2.0)
-                    def apply_contrast(p):
-                        v = (p - 128) * gain + 128
-                        return max(0, min(255, int(v)))
-                    a = a.point(apply_contrast)
-                    text_layer.putalpha(a)
-                elif blur > 5:
-                    # Apply blur effect
-                    from PIL import ImageFilter
-                    blur_amount = (blur - 5) * 0.5  # 0.5 to 2.5 radius
-                    text_layer = text_layer.filter(ImageFilter.GaussianBlur(radius=blur_amount))
-                
-                # Composite text onto canvas with color
-                r, g, b, a = text_layer.split()
-                colored_text = Image.new("RGB", (screen_size, screen_size), color)
-                canvas.paste(colored_text, mask=a)
+                item["content"] = content
+                item["icon_ref"] = self._resolve_icon_ref(layer)
+                item["icon_size"] = int(layer.get("icon_size", 16))
 
             elif l_type == "image":
-                 image_path = layer.get("image_path")
-                 if not image_path: continue
-                 
-                 img = None
-                 
-                 # Handle Media Source
-                 if image_path.startswith("media-source://"):
-                     try:
-                         from homeassistant.components import media_source
-                         # Resolve media source URL
-                         resolved = await media_source.async_resolve_media(self.hass, image_path, None)
-                         media_url = resolved.url
-                         
-                         # If it's a relative URL, prepend internal URL or handle locally
-                         # resolved.url is typically /media/...
-                         # We can fetch it via HTTP from localhost
-                         
-                         # However, if it maps to a file, maybe we can access directly? 
-                         # But abstracting via HTTP is safer for all media sources.
-                         
-                         # Use internal HTTP client to fetch
-                         from homeassistant.helpers.aiohttp_client import async_get_clientsession
-                         session = async_get_clientsession(self.hass)
-                         
-                         # Construct full URL if needed, but usually aiohttp handles relative to host if configured?
-                         # No, we need absolute URL or use loopback. 
-                         # Actually, HA's aiohttp client is for external. 
-                         # For internal, we might need to assume localhost.
-                         # Better: use hass.http?
-                         
-                         # Let's try to fetch relative URL using the server's port?
-                         # simpler: "http://127.0.0.1:8123" + media_url
-                         
-                         url = f"http://127.0.0.1:{self.hass.http.server_port}{media_url}"
-                         async with session.get(url) as resp:
-                             if resp.status == 200:
-                                 data = await resp.read()
-                                 import io
-                                 img = Image.open(io.BytesIO(data))
-                             else:
-                                 _LOGGER.error(f"Failed to fetch media: {resp.status}")
-                                 continue
-                     except Exception as e:
-                         _LOGGER.error(f"Error resolving media source {image_path}: {e}")
-                         continue
-
-                 else:
-                     # Legacy/Local path handling
-                     # Resolve path (Check 'www' or absolute)
-                     if not os.path.isabs(image_path):
-                         # Default to config/www/idotmatrix/
-                         base_www = self.hass.config.path("www", "idotmatrix")
-                         potential = os.path.join(base_www, image_path)
-                         if os.path.exists(potential):
-                             image_path = potential
-                         else:
-                             # Try locally in integration (bundled icons?)
-                             local = os.path.join(os.path.dirname(__file__), "images", image_path)
-                             if os.path.exists(local):
-                                 image_path = local
-                                 
-                     if os.path.exists(image_path):
-                         try:
-                            img = Image.open(image_path)
-                         except Exception as e:
-                             _LOGGER.error(f"Failed to load image file {image_path}: {e}")
-                             continue
-                
-                 if img:
-                     try:
-                         img = img.convert("RGBA")
-                         # Resize if size provided
-                         w = layer.get("width")
-                         h = layer.get("height")
-                         if w and h:
-                             img = img.resize((int(w), int(h)))
-                         
-                         canvas.paste(img, (x, y), img)
-                     except Exception as e:
-                         _LOGGER.error(f"Failed to process image layer: {e}")
-
-        return canvas
+                if not layer.get("image_path"):
+                    continue
+
+            items.append(item)
+        return items
+
+    async def _async_fetch_assets(self, items: list[dict]) -> None:
+        """Fetch all icons and images of a face concurrently.
+
+        Every fetch gets its own timeout, so the render waits for the slowest
+        asset instead of the sum of all of them; assets that time out are
+        simply left out of this frame.
+        """
+        iconify_keys = {
+            (item["icon_ref"], item["icon_size"])
+            for item in items
+            if item.get("icon_ref") and self._is_batched_icon(item["icon_ref"])
+        }
+
+        async def fetch_icon(item: dict) -> None:
+            item["icon"] = await self._load_icon(item["icon_ref"], item["icon_size"])
+
+        async def fetch_image(item: dict) -> None:
+            item["image"] = await self._async_load_layer_image(item["layer"])
+
+        jobs = [("icons", self._async_prefetch_icons(iconify_keys))] if iconify_keys else []
+        for item in items:
+            if (icon_ref := item.get("icon_ref")) and not self._is_batched_icon(icon_ref):
+                jobs.append((icon_ref, fetch_icon(item)))
+            if item["layer"].get("type", "text") == "image":
+                jobs.append((item["layer"]["image_path"], fetch_image(item)))
+
+        if jobs:
+            await asyncio.gather(*(self._async_with_timeout(name, job) for name, job in jobs))
+
+        # Batched icons were put into the icon cache by the prefetch
+        for item in items:
+            if (icon_ref := item.get("icon_ref")) and self._is_batched_icon(icon_ref):
+                cached = self.icon_cache.get((icon_ref, item["icon_size"]))
+                item["icon"] = None if cached is MISSING else cached
+
+    @staticmethod
+    def _is_batched_icon(icon_ref: str) -> bool:
+        """Return True for icons fetched through the Iconify batch prefetch."""
+        return is_iconify_ref(icon_ref) and not icon_ref.startswith("mdi:")
+
+    @staticmethod
+    async def _async_with_timeout(name: str, job) -> None:
+        """Await an asset fetch, giving up after ASSET_FETCH_TIMEOUT."""
+        try:
+            async with asyncio.timeout(ASSET_FETCH_TIMEOUT):
+                await job
+        except TimeoutError:
+            _LOGGER.warning("Timed out fetching %s for face render", name)
+        except Exception as exc:
+            _LOGGER.warning("Failed to fetch %s for face render: %s", name, exc)
+
+    async def _async_load_layer_image(self, layer: dict) -> Image.Image | None:
+        """Return the ready-to-paste RGBA tile of an image layer.
+
+        Tiles are cached by (source, version, size), where the version is the
+        file mtime or the HTTP validator, so an unchanged image is decoded,
+        converted and resized only once.
+        """
+        image_path = layer["image_path"]
+        w = layer.get("width")
+        h = layer.get("height")
+        size = (int(w), int(h)) if w and h else None
+
+        located = await self._async_locate_image(image_path)
+        if located is None:
+            return None
+        identity, version, source = located
+
+        cache_key = (identity, version, size)
+        tile = self.image_cache.get(cache_key)
+        if tile is not MISSING:
+            return tile
+
+        tile = await self.executor.async_run(render.decode_tile, source, size)
+        if tile is None:
+            return None
+        tile.readonly = 1  # shared with the cache; copy-on-write
+        self.image_cache.put(cache_key, tile)
+        return tile
+
+    async def _async_locate_image(self, image_path: str) -> tuple[str, object, str | bytes] | None:
+        """Find an image layer's source as (identity, version, path or bytes)."""
+        # Handle Media Source
+        if image_path.startswith("media-source://"):
+            try:
+                if path := self._media_source_to_path(image_path):
+                    return await self.hass.async_add_executor_job(_stat_image, [path])
+
+                from homeassistant.components import media_source
+                # Resolve media source URL
+                resolved = await media_source.async_resolve_media(self.hass, image_path, None)
+                if path := getattr(resolved, "path", None):
+                    return await self.hass.async_add_executor_job(_stat_image, [str(path)])
+                media_url = resolved.url
+                if path := self._local_url_to_path(media_url):
+                    return await self.hass.async_add_executor_job(_stat_image, [path])
+
+                # Remote sources go through the revalidating HTTP cache
+                if media_url.startswith(("http://", "https://")):
+                    cached = await get_http_cache(self.hass).async_get(media_url)
+                    if cached is None:
+                        return None
+                    return image_path, cached.version, cached.body
+
+                # Dynamic sources (cameras, TTS, ...) are served by HA itself
+                media_url = f"http://127.0.0.1:{self.hass.http.server_port}{media_url}"
+                session = async_get_clientsession(self.hass)
+                async with session.get(media_url) as resp:
+                    if resp.status != 200:
+                        _LOGGER.error(f"Failed to fetch media: {resp.status}")
+                        return None
+                    data = await resp.read()
+                    version = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+                # Without validators the body digest identifies the version
+                if not version:
+                    version = hashlib.sha1(data).hexdigest()
+                return image_path, version, data
+            except Exception as e:
+                _LOGGER.error(f"Error resolving media source {image_path}: {e}")
+                return None
+
+        # Legacy/Local path handling
+        # Resolve path (Check 'www' or absolute)
+        if not os.path.isabs(image_path):
+            # Default to config/www/idotmatrix/
+            candidates = [
+                self.hass.config.path("www", "idotmatrix", image_path),
+                # Try locally in integration (bundled icons?)
+                os.path.join(os.path.dirname(__file__), "images", image_path),
+            ]
+        else:
+            candidates = [image_path]
+
+        return await self.hass.async_add_executor_job(_stat_image, candidates)
+
+    def _media_source_to_path(self, media_id: str) -> str | None:
+        """Map a local media-source ID to a file in one of HA's media dirs.
+
+        media-source://media_source/<dir_id>/<path> is served straight from
+        hass.config.media_dirs, so it can be read without resolving it.
+        """
+        prefix = "media-source://media_source/"
+        if not media_id.startswith(prefix):
+            return None
+        dir_id, _, rel_path = media_id[len(prefix):].partition("/")
+        base = self.hass.config.media_dirs.get(dir_id)
+        if not base or not rel_path:
+            return None
+        return _safe_join(base, unquote(rel_path))
+
+    def _local_url_to_path(self, url: str) -> str | None:
+        """Map /local/... and /media/<dir_id>/... URLs to files on disk."""
+        path = unquote(url.split("?", 1)[0])
+        if path.startswith("/local/"):
+            return _safe_join(self.hass.config.path("www"), path[len("/local/"):])
+        if path.startswith("/media/"):
+            dir_id, _, rel_path = path[len("/media/"):].partition("/")
+            if (base := self.hass.config.media_dirs.get(dir_id)) and rel_path:
+                return _safe_join(base, rel_path)
+        return None
+
+    def _resolve_icon_ref(self, layer: dict) -> str | None:
+        """Return the icon reference of a text layer, rendering icon_template."""
+        if layer.get("type", "text") != "text":
+            return None
+        icon_ref = layer.get("icon")
+        if not icon_ref and (icon_template := layer.get("icon_template")):
+            try:
+                tpl = template.Template(icon_template, self.hass)
+                icon_ref = tpl.async_render(parse_result=False)
+            except Exception as e:
+                _LOGGER.warning(f"Error evaluating icon template: {e}")
+        return icon_ref.strip() if isinstance(icon_ref, str) and icon_ref.strip() else None
+
+    async def _async_prefetch_icons(self, requests) -> None:
+        """Fetch all uncached Iconify icons of a face in batched requests."""
+        missing = {
+            (ref, size)
+            for ref, size in requests
+            if is_iconify_ref(ref)
+            and not ref.startswith("mdi:")
+            and self.icon_cache.get((ref, size), count=False) is MISSING
+        }
+        if not missing:
+            return
+        masks = await get_iconify_icons(self.hass).async_render_many(missing)
+        for key in missing:
+            if (mask := masks.get(key)) is not None:
+                mask.readonly = 1
+                self.icon_cache.put(key, mask)
+            else:
+                self.icon_cache.put_negative(key)
 
     async def _load_icon(self, icon_ref: str, size: int) -> Image.Image | None:
-        """Fetch and rasterize an icon reference."""
+        """Fetch and rasterize an icon reference into a read-only alpha mask.
+
+        The returned "L" image is shared with the icon cache and must not be
+        modified; paste it as a mask instead of copying it.
+        """
         if not icon_ref:
             return None
 
@@ -406,46 +629,69 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
             return None
 
         cache_key = (icon_ref, size)
-        if cache_key in self._icon_cache:
-            cached = self._icon_cache[cache_key]
-            return cached.copy() if cached else None
+        cached = self.icon_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
 
+        mask = await self._fetch_icon(icon_ref, size)
+        if mask is None:
+            self.icon_cache.put_negative(cache_key)
+            return None
+
+        mask.readonly = 1  # copy-on-write if anything tries to draw on it
+        self.icon_cache.put(cache_key, mask)
+        return mask
+
+    async def _fetch_icon(self, icon_ref: str, size: int) -> Image.Image | None:
+        """Fetch and rasterize an icon reference into an alpha mask."""
         url = None
         if icon_ref.startswith("mdi:"):
             icon_name = icon_ref.split(":", 1)[1]
-            icon_img = await self._render_mdi_icon(icon_name, size)
+            icon_img = await get_mdi_icons(self.hass).async_render(icon_name, size)
             if icon_img:
-                self._icon_cache[cache_key] = icon_img
-                return icon_img.copy()
-
-        if ":" in icon_ref and not icon_ref.startswith(("http://", "https://")):
-            from urllib.parse import quote
-
-            icon_id = quote(icon_ref, safe=":/-")
-            url = f"https://api.iconify.design/{icon_id}.svg"
-        elif icon_ref.startswith("/"):
-            url = f"http://127.0.0.1:{self.hass.http.server_port}{icon_ref}"
+                return icon_img
+
+        if is_iconify_ref(icon_ref):
+            return await get_iconify_icons(self.hass).async_render(icon_ref, size)
+
+        data = None
+        content_type = ""
+        if icon_ref.startswith("/"):
+            # /local/... lives in config/www: read it from disk instead of
+            # looping back through the HTTP server
+            if path := self._local_url_to_path(icon_ref):
+                data = await self.hass.async_add_executor_job(_read_file, path)
+                if data is None:
+                    _LOGGER.warning("Icon file not found: %s", icon_ref)
+                    return None
+            else:
+                url = f"http://127.0.0.1:{self.hass.http.server_port}{icon_ref}"
         elif icon_ref.startswith("http://") or icon_ref.startswith("https://"):
             url = icon_ref
 
-        if not url:
+        if data is None and not url:
             _LOGGER.warning("Unsupported icon reference: %s", icon_ref)
             return None
 
         try:
-            session = async_get_clientsession(self.hass)
-            ssl = False if url.startswith("https://api.iconify.design/") else None
-            async with session.get(url, ssl=ssl) as resp:
-                if resp.status != 200:
-                    _LOGGER.warning("Failed to fetch icon %s (status %s)", icon_ref, resp.status)
-                    self._icon_cache[cache_key] = None
+            if data is None and url.startswith("http://127.0.0.1"):
+                session = async_get_clientsession(self.hass)
+                async with session.get(url) as resp:
+                    if resp.status != 200:
+                        _LOGGER.warning("Failed to fetch icon %s (status %s)", icon_ref, resp.status)
+                        return None
+                    content_type = resp.headers.get("Content-Type", "")
+                    data = await resp.read()
+            elif data is None:
+                cached = await get_http_cache(self.hass).async_get(url)
+                if cached is None:
                     return None
-                content_type = resp.headers.get("Content-Type", "")
-                data = await resp.read()
+                content_type = cached.content_type
+                data = cached.body
 
             if "svg" in content_type or data.lstrip().startswith(b"<svg") or data.lstrip().startswith(b"<?xml"):
-                png_bytes = await self.hass.async_add_executor_job(
-                    self._svg_to_png,
+                png_bytes = await self.executor.async_run(
+                    svg_to_png,
                     data,
                     size,
                 )
@@ -455,105 +701,14 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
                             "SVG icon rendering unavailable; install cairo to enable SVG icons."
                         )
                         self._svg_error_logged = True
-                    self._icon_cache[cache_key] = None
                     return None
-                icon_img = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
-            else:
-                icon_img = Image.open(io.BytesIO(data)).convert("RGBA")
-                if icon_img.size != (size, size):
-                    icon_img = icon_img.resize((size, size))
-            self._icon_cache[cache_key] = icon_img
-            return icon_img.copy()
+                data = png_bytes
+            # Large remote icons must not be decoded and resized on the event loop
+            return await self.executor.async_run(render.decode_icon, data, size)
         except Exception as exc:
             _LOGGER.warning("Failed to render icon %s: %s", icon_ref, exc)
-            self._icon_cache[cache_key] = None
             return None
 
-    @staticmethod
-    def _svg_to_png(svg_data: bytes, size: int) -> bytes | None:
-        """Convert SVG bytes to PNG bytes."""
-        try:
-            import cairosvg
-            return cairosvg.svg2png(
-                bytestring=svg_data,
-                output_width=size,
-                output_height=size,
-            )
-        except Exception:
-            return None
-
-    async def _render_mdi_icon(self, icon_name: str, size: int) -> Image.Image | None:
-        """Render an MDI icon using the bundled font."""
-        await self._ensure_mdi_assets()
-
-        if not self._mdi_meta or not self._mdi_font_bytes:
-            return None
-
-        codepoint = self._mdi_meta.get(icon_name)
-        if not codepoint:
-            if icon_name not in self._mdi_unknown_icons:
-                _LOGGER.warning("Unknown MDI icon: %s", icon_name)
-                self._mdi_unknown_icons.add(icon_name)
-            return None
-
-        font = self._mdi_fonts.get(size)
-        if not font:
-            font = ImageFont.truetype(io.BytesIO(self._mdi_font_bytes), size)
-            self._mdi_fonts[size] = font
-
-        icon_img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(icon_img)
-        char = chr(int(codepoint, 16))
-
-        bbox = draw.textbbox((0, 0), char, font=font)
-        x = (size - (bbox[2] - bbox[0])) // 2 - bbox[0]
-        y = (size - (bbox[3] - bbox[1])) // 2 - bbox[1]
-        draw.text((x, y), char, font=font, fill=(255, 255, 255, 255))
-        return icon_img
-
-    async def _ensure_mdi_assets(self) -> None:
-        """Load MDI meta and font bytes."""
-        if self._mdi_meta and self._mdi_font_bytes:
-            return
-
-        async with self._mdi_lock:
-            if self._mdi_meta and self._mdi_font_bytes:
-                return
-
-            session = async_get_clientsession(self.hass)
-            try:
-                async with session.get(MDI_META_URL, ssl=False) as resp:
-                    if resp.status != 200:
-                        if not self._mdi_error_logged:
-                            _LOGGER.warning("Failed to fetch MDI metadata (status %s)", resp.status)
-                            self._mdi_error_logged = True
-                        return
-                    meta_data = await resp.json(content_type=None)
-
-                async with session.get(MDI_FONT_URL, ssl=False) as resp:
-                    if resp.status != 200:
-                        if not self._mdi_error_logged:
-                            _LOGGER.warning("Failed to fetch MDI font (status %s)", resp.status)
-                            self._mdi_error_logged = True
-                        return
-                    font_bytes = await resp.read()
-            except Exception as exc:
-                if not self._mdi_error_logged:
-                    _LOGGER.warning("Failed to load MDI assets: %s", exc)
-                    self._mdi_error_logged = True
-                return
-
-            if isinstance(meta_data, list):
-                self._mdi_meta = {
-                    item["name"]: item["codepoint"]
-                    for item in meta_data
-                    if isinstance(item, dict) and "name" in item and "codepoint" in item
-                }
-            else:
-                self._mdi_meta = None
-
-            self._mdi_font_bytes = font_bytes
-
     async def async_load_settings(self) -> None:
         """Load settings from storage."""
         if (data := await self._store.async_load()):
@@ -574,42 +729,30 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
         settings = self.text_settings
 
         if self.display_mode == DISPLAY_MODE_DESIGN and settings.get("mode") == "advanced":
-             # Advanced Rendering
-             screen_size = int(settings.get("screen_size", 32))
-             image = await self._render_face(settings.get("layers", []), screen_size)
-             
-             # Save image in executor to avoid blocking
-             with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                tmp_path = tmp.name
-             
-             await self.hass.async_add_executor_job(image.save, tmp_path)
-             
-             try:
-                await IDMImage().setMode(1)
-                await IDMImage().uploadProcessed(tmp_path, pixel_size=screen_size)
-             finally:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
+             if (clock := self._native_clock(settings.get("layers", []))) is not None:
+                 # Clock-only face: the panel draws and advances it by itself
+                 await self._async_show_native_clock(*clock)
+             else:
+                 # Advanced Rendering
+                 screen_size = int(settings.get("screen_size", 32))
+                 frame = await self._async_render_face_frame(
+                     settings.get("layers", []),
+                     screen_size,
+                     colors=settings.get("palette_colors"),
+                     dither=settings.get("dither"),
+                 )
+                 await self._async_show_frame(frame)
              
         elif text:
             # Render Text (Basic Mode)
             if settings.get("multiline", False):
                 await self._set_multiline_text(text, settings)
+            elif settings.get("animation_mode", 1) == 0:
+                # Static text: use whichever protocol is cheapest to send
+                await self._async_show_static_text(text, settings)
             else:
                 # Standard Scroller
-                await Text().setMode(
-                    text=text,
-                    font_size=int(settings.get("font_size", 10)), 
-                    font_path=settings.get("font"),
-                    text_mode=settings.get("animation_mode", 1),
-                    speed=settings.get("speed", 80),
-                    text_color_mode=settings.get("color_mode", 1),
-                    text_color=tuple(settings.get("color", (255, 0, 0))),
-                    text_bg_mode=0,
-                    text_bg_color=(0, 0, 0),
-                    spacing=settings.get("spacing", 1),
-                    proportional=settings.get("proportional", True)
-                )
+                await Text().setMode(text=text, **self._text_options(settings))
         else:
             # Render Clock (Default fallback)
             # Use self.text_settings for clock config
@@ -638,164 +781,247 @@ class IDotMatrixCoordinator(DataUpdateCoordinator):
 
     async def _set_multiline_text(self, text: str, settings: dict) -> None:
         """Generate an image from text and upload it."""
+        frame = await self.executor.async_run_cpu(
+            render.render_multiline_frame, text, dict(settings)
+        )
+        await self._async_show_frame(frame)
+
+    def _native_clock(self, layers: list) -> tuple[bool, list] | None:
+        """Return (hour24, color) if the face is just a clock the panel can show itself."""
+        if not self.text_settings.get("native_clock", True) or len(layers) != 1:
+            return None
+        layer = layers[0]
+        if layer.get("type", "text") != "text" or any(
+            layer.get(key) for key in _NON_CLOCK_LAYER_KEYS
+        ):
+            return None
+        match = CLOCK_TEMPLATE_REGEX.match(layer.get("template") or layer.get("content") or "")
+        if match is None or (hour24 := NATIVE_CLOCK_FORMATS.get(match["format"])) is None:
+            return None
+        return hour24, list(layer.get("color", [255, 255, 255]))
+
+    async def _async_show_native_clock(self, hour24: bool, color: list) -> None:
+        """Sync the panel's clock and switch to it instead of uploading frames."""
+        await self._async_sync_clock()
+        await Clock().setMode(
+            style=self.text_settings.get("clock_style", 0),
+            visibleDate=False,
+            hour24=hour24,
+            r=color[0],
+            g=color[1],
+            b=color[2],
+        )
+
+    async def _async_sync_clock(self) -> None:
+        """Set the panel's clock to Home Assistant's local time.
+
+        The sync is only recorded if the command actually went out: setTime
+        also returns its bytes when the send was dropped for lack of a
+        connection.
+        """
+        conn = ConnectionManager()
+        sent_from = conn.send_count
+        now = dt_util.now()
+        await Common().setTime(
+            year=now.year,
+            month=now.month,
+            day=now.day,
+            hour=now.hour,
+            minute=now.minute,
+            second=now.second,
+        )
+        client = conn.client
+        if conn.send_count != sent_from + 1 or client is None or not client.is_connected:
+            self._clock_sync = None
+            return
+        self._clock_sync = (client, now.utcoffset(), dt_util.utcnow())
+
+    async def _async_show_static_text(self, text: str, settings: dict) -> None:
+        """Show non-scrolling text through the cheapest equivalent protocol.
+
+        The candidates are only costed the first time a text is shown with
+        given options; afterwards the remembered method is built directly,
+        so a repeated update never switches protocols and loses the shadow.
+        """
         screen_size = int(settings.get("screen_size", 32))
-        font_name = settings.get("font")
-        color = tuple(settings.get("color", (255, 0, 0)))
-        spacing = int(settings.get("spacing", 1))
-        spacing_y = int(settings.get("spacing_y", 1))
-        blur = int(settings.get("blur", 5))
-        
-        # Resolve font path
-        # Note: __file__ here is coordinator.py, so we need to adjust path logic
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        fonts_dir = os.path.join(base_path, "fonts")
-        font_path = os.path.join(fonts_dir, "Rain-DRM3.otf")
-        
-        if font_name:
-            if not os.path.isabs(font_name):
-                 potential = os.path.join(fonts_dir, font_name)
-                 if os.path.exists(potential):
-                     font_path = potential
-            elif os.path.exists(font_name):
-                font_path = font_name
-                
-        # Determine font size and max scanning range if autosize is on
-        initial_font_size = int(settings.get("font_size", 10))
-        target_font_size = initial_font_size
-        
-        if settings.get("autosize", False):
-            # Start from user's size or 32, whichever is reasonable, and shrink until fit
-            # Or always start large? Let's start from current size and shrink, 
-            # OR start from 32 (max) to find biggest possible fit? "Perfectly" usually means "Maximize".
-            # Let's try to Maximize: Start at 32 (or screen_size) down to 6.
-            start_size = screen_size
-            end_size = 6
+        options = self._text_options(settings)
+        link_rate = ConnectionManager().link_rate
+        key = (text, screen_size, tuple(sorted(options.items())))
+
+        best = None
+        method = self.text_plan_cache.get(key)
+        if method is not MISSING:
+            best = await self.executor.async_run_cpu(
+                planner.build_candidate, method, text, options, screen_size, False
+            )
+        if best is None:
+            candidates = await self.executor.async_run_cpu(
+                planner.plan_static_text, text, options, screen_size, link_rate
+            )
+            self.last_text_plan = [
+                {
+                    "method": candidate.method,
+                    "bytes": candidate.size,
+                    "cost_ms": round(candidate.cost(link_rate) * 1000, 1),
+                }
+                for candidate in candidates
+            ]
+            best = candidates[0]
+            self.text_plan_cache.put(key, best.method)
+
+        _LOGGER.debug("Showing static text %r as %s (%s bytes)", text, best.method, best.size)
+        if best.method == planner.METHOD_PNG:
+            # also lets an unchanged or nearly unchanged label skip the upload
+            await self._async_show_frame(best.frame)
+        elif best.method == planner.METHOD_GIF:
+            await Gif().sendPayloads(best.payloads)
         else:
-            # Single pass
-            start_size = initial_font_size
-            end_size = initial_font_size
+            await Text().sendPackets(best.payloads)
+
+    async def _async_show_frame(self, frame: render.PanelFrame) -> None:
+        """Put a prepared frame on the panel as cheaply as possible.
+
+        If nothing else was sent to the panel since the last frame, only the
+        pixels that differ from the shadow are written, as batched graffiti
+        packets, while those are smaller than the last full image upload.
+        Otherwise the frame is uploaded as PNG, encoded only if the payload
+        cache has not seen the same pixels before.
+        """
+        width, height = frame.size
+        pixels = np.frombuffer(frame.pixels, dtype=np.uint8).reshape(height, width, 3)
+
+        # Serialized, so concurrent updates never diff against the same shadow
+        async with self._frame_lock:
+            conn = ConnectionManager()
+            # Reconnect first: a new client means the panel may have restarted
+            # and no longer shows the shadow
+            await conn.connect()
+            client = conn.client
+
+            shadow = self._framebuffer
+            trusted = (
+                shadow is not None
+                and client is not None
+                and client.is_connected
+                and self._framebuffer_tag == (client, conn.send_count)
+                and shadow.shape == pixels.shape
+            )
+            # Whatever is sent from here on, the shadow is only valid again
+            # once it has gone out completely
+            self._framebuffer = None
+
+            if trusted:
+                points = _changed_pixels(shadow, pixels)
+                if not len(points):
+                    self.frame_stats["unchanged"] += 1
+                    self._framebuffer = shadow
+                    return
+                graffiti_bytes = sum(map(len, buildPixelPackets(points)))
+                if graffiti_bytes < self._frame_bytes:
+                    sent_from = conn.send_count
+                    if await Graffiti().setPixels(points) is not False:
+                        self.frame_stats["graffiti"] += 1
+                        self._set_framebuffer(pixels, conn, client, sent_from, 1)
+                        return
 
-        font_path_to_use = font_path
+            data = await self._async_frame_payloads(frame)
+            await IDMImage().setMode(1)
+            sent_from = conn.send_count
+            if await IDMImage().sendPayloads(data):
+                self.frame_stats["full"] += 1
+                self._frame_bytes = sum(map(len, data))
+                self._set_framebuffer(pixels, conn, client, sent_from, len(data))
 
-        # Iterative resizing loop
-        for s in range(start_size, end_size - 1, -1):
-            target_font_size = s
-            try:
-                if font_path_to_use.lower().endswith(".bdf"):
-                     font = ImageFont.load(font_path_to_use)
-                     # BDF fonts are fixed size, autosize won't work well unless we pick different files.
-                     # For now, skip autosize on BDF or just use it as is.
-                else:
-                     font = ImageFont.truetype(font_path_to_use, s)
-            except:
-                font = ImageFont.load_default()
-
-            # Pixel-based Word Wrapping (Simulated for check)
-            words = text.split(' ')
-            lines = []
-            current_line = []
-            
-            def get_word_width(word):
-                if not word: return 0
-                w = 0
-                for i, char in enumerate(word):
-                    bbox = font.getbbox(char)
-                    char_w = (bbox[2] - bbox[0]) if bbox else font.getlength(char)
-                    w += char_w + spacing
-                return w - spacing
-            
-            # Recalculate space width for this font size
-            try:
-                space_bbox = font.getbbox(" ")
-                space_w = (space_bbox[2] - space_bbox[0]) if space_bbox else font.getlength(" ")
-            except:
-                space_w = 4
-            space_width = space_w + spacing
-            if space_width < 1: space_width = 1
-            
-            current_line_width = 0
-            
-            for word in words:
-                word_width = get_word_width(word)
-                if current_line_width + word_width <= screen_size:
-                    current_line.append(word)
-                    current_line_width += word_width + space_width
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                        current_line = []
-                        current_line_width = 0
-                    current_line.append(word)
-                    current_line_width = word_width + space_width
-            if current_line:
-                lines.append(current_line)
-            
-            # Check Height
-            ascent, descent = font.getmetrics()
-            line_height = ascent + descent + spacing_y
-            total_height = len(lines) * line_height
-            
-            # If autosize is OFF, we accept the first pass (initial_font_size)
-            if not settings.get("autosize", False):
-                break
-                
-            # If autosize is ON, check if it fits
-            if total_height <= screen_size and all(get_word_width(w) <= screen_size for w in words):
-                 # Fits!
-                 break
-        
-        # Draw lines using chosen target_font_size
-        text_layer = Image.new("RGBA", (screen_size, screen_size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(text_layer)
-        
-        y = (screen_size - total_height) // 2 if settings.get("autosize", False) else 0 # Center vertically if autosizing
-        if y < 0: y = 0
-        
-        for line_words in lines:
-            if y >= screen_size: break
-            # Center Horizontally?
-            # Standard wrapper is left aligned. Perfect fit usually implies Center/Center.
-            # Let's calculate line width for centering
-            line_w = 0
-            for i, w in enumerate(line_words):
-                 line_w += get_word_width(w)
-                 if i < len(line_words) - 1: line_w += space_width
-            
-            x = (screen_size - line_w) // 2 if settings.get("autosize", False) else 0
-            if x < 0: x = 0
-            
-            for i, word in enumerate(line_words):
-                for char in word:
-                    if x >= screen_size: break
-                    draw.text((x, y), char, font=font, fill=(255, 255, 255, 255))
-                    bbox = font.getbbox(char)
-                    char_w = (bbox[2] - bbox[0]) if bbox else font.getlength(char)
-                    x += char_w + spacing
-                if i < len(line_words) - 1:
-                     x += space_width
-            y += line_height
-            
-        if blur < 5:
-             r, g, b, a = text_layer.split()
-             gain = 1.0 + ((5 - blur) * 2.0) 
-             def apply_contrast(p):
-                 v = (p - 128) * gain + 128
-                 return max(0, min(255, int(v)))
-             a = a.point(apply_contrast)
-             text_layer.putalpha(a)
-             
-        final_image = Image.new("RGB", (screen_size, screen_size), (0, 0, 0))
-        r, g, b, a = text_layer.split()
-        colored_text = Image.new("RGB", (screen_size, screen_size), color)
-        final_image.paste(colored_text, mask=a)
-        
-        image = final_image
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-            image.save(tmp.name)
-            tmp_path = tmp.name
-        try:
+    @staticmethod
+    async def _async_frame_payloads(frame: render.PanelFrame) -> tuple[bytes, ...]:
+        """Return the framed PNG payloads of a frame through the payload cache."""
+        return await IDMImage()._encodePrepared(frame.image(), frame.png)
+
+    def _set_framebuffer(
+        self,
+        pixels: np.ndarray,
+        conn: ConnectionManager,
+        client,
+        sent_from: int,
+        sends: int,
+    ) -> None:
+        """Remember what the panel shows if exactly our sends went out to ``client``.
+
+        Fewer sends mean writes were dropped (not connected), more mean
+        something else was sent in between, and a different client means the
+        connection was re-established mid-frame; in every case the panel
+        content is unknown and the next frame is uploaded in full.
+        """
+        if (
+            conn.send_count != sent_from + sends
+            or client is None
+            or conn.client is not client
+            or not client.is_connected
+        ):
+            self._framebuffer = None
+            return
+        self._framebuffer = pixels
+        self._framebuffer_tag = (client, conn.send_count)
+
+    @staticmethod
+    def _text_options(settings: dict) -> dict:
+        """Map text settings onto the keyword arguments of the Text module."""
+        return {
+            "font_size": int(settings.get("font_size", 10)),
+            "font_path": settings.get("font"),
+            "text_mode": settings.get("animation_mode", 1),
+            "speed": settings.get("speed", 80),
+            "text_color_mode": settings.get("color_mode", 1),
+            "text_color": tuple(settings.get("color", (255, 0, 0))),
+            "text_bg_mode": 0,
+            "text_bg_color": (0, 0, 0),
+            "spacing": settings.get("spacing", 1),
+            "proportional": settings.get("proportional", True),
+        }
+
+    async def async_prepare_text(self, text: str, **overrides) -> tuple[str, tuple[bytes, ...]]:
+        """Render basic-mode text into payloads that can be sent later.
+
+        ``overrides`` replace text settings (e.g. ``color``) for this render
+        only. Nothing is sent or stored; pass the result to
+        async_send_prepared, possibly many times.
+        """
+        settings = {**self.text_settings, **overrides}
+        if settings.get("multiline", False):
+            frame = await self.executor.async_run_cpu(
+                render.render_multiline_frame, text, settings
+            )
+            return "image", await self._async_frame_payloads(frame)
+        packets = await self.executor.async_run(
+            Text().buildPackets, text, **self._text_options(settings)
+        )
+        return "text", tuple(packets)
+
+    async def async_send_prepared(self, prepared: tuple[str, tuple[bytes, ...]]) -> None:
+        """Send payloads rendered by async_prepare_text to the device."""
+        kind, payloads = prepared
+        if kind == "image":
             await IDMImage().setMode(1)
-            await IDMImage().uploadProcessed(tmp_path, pixel_size=screen_size)
-        finally:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+            await IDMImage().sendPayloads(payloads)
+        else:
+            await Text().sendPackets(payloads)
+
+    async def async_upload_text_animation(
+        self, words: list[str], colors: list, delay: float
+    ) -> None:
+        """Render one frame per word and upload them as a GIF the panel loops.
+
+        After the single upload the panel plays the words by itself, with
+        exact timing and no further Bluetooth traffic.
+        """
+        settings = self.text_settings
+        frames = await asyncio.gather(
+            *(
+                self.executor.async_run_cpu(
+                    render.render_multiline_text, word, {**settings, "color": color}
+                )
+                for word, color in zip(words, colors)
+            )
+        )
+        duration = max(10, round(delay * 1000))
+        await Gif().uploadFrames(list(frames), [duration] * len(frames))
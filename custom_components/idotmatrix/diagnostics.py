@@ -0,0 +1,42 @@
+"""Diagnostics support for iDotMatrix."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_MAC, DOMAIN
+from .client.connectionManager import ConnectionManager
+from .client.modules.image import Image as IDMImage
+from .http_cache import get_http_cache
+from .executor import get_render_executor
+
+TO_REDACT = {CONF_MAC}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "display_mode": coordinator.display_mode,
+        "frame_updates": coordinator.frame_stats,
+        "last_text_plan": coordinator.last_text_plan,
+        "caches": {
+            "icons": coordinator.icon_cache.stats,
+            "images": coordinator.image_cache.stats,
+            "text_plans": coordinator.text_plan_cache.stats,
+            "http": get_http_cache(hass).stats,
+            "payloads": IDMImage.payload_cache.stats,
+        },
+        "render_executor": get_render_executor(hass).stats,
+        "link_rate": ConnectionManager().link_rate,
+    }
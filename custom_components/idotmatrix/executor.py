@@ -0,0 +1,180 @@
+"""Dedicated worker pools for iDotMatrix rendering and encoding."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+
+from .client import fontLoader
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# PIL releases the GIL for most heavy operations, two workers keep a panel
+# responsive without competing much with the rest of Home Assistant
+DEFAULT_WORKERS = 2
+# Jobs allowed to wait for a worker before callers are back-pressured
+DEFAULT_QUEUE_SIZE = 16
+# Upper bound for the optional process backend
+MAX_PROCESS_WORKERS = 4
+
+
+def get_render_executor(hass: HomeAssistant) -> RenderExecutor:
+    """Return the render executor shared by all iDotMatrix panels."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (executor := domain_data.get("_executor")) is None:
+        executor = domain_data["_executor"] = RenderExecutor()
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, lambda event: executor.shutdown()
+        )
+    return executor
+
+
+def _timed_call(func: Callable[..., _T], *args: Any, **kwargs: Any) -> tuple[_T, float, float]:
+    """Call ``func`` and return its result with start/finish timestamps.
+
+    Module level so it can be pickled to worker processes; ``time.monotonic``
+    is system-wide, so the timestamps compare with the parent's.
+    """
+    started = time.monotonic()
+    result = func(*args, **kwargs)
+    return result, started, time.monotonic()
+
+
+class _Stat:
+    """Running count/total/max of a duration in seconds."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> dict[str, float | None]:
+        return {
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class RenderExecutor:
+    """Size-bounded worker pool owned by the integration.
+
+    Rendering and encoding go through here instead of Home Assistant's shared
+    executor, so a burst of panel updates can neither starve other
+    integrations nor be starved by them. At most ``max_workers`` jobs run and
+    ``max_queue`` wait; further callers await a free slot.
+
+    With the process backend enabled, ``async_run_cpu`` jobs go to worker
+    processes instead, so GIL-bound drawing and encoding for many panels
+    spread across cores. Those jobs must be picklable module-level functions
+    taking picklable arguments (PIL images are).
+    """
+
+    def __init__(
+        self, max_workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_QUEUE_SIZE
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._threads = ThreadPoolExecutor(max_workers, thread_name_prefix="idotmatrix_render")
+        self._processes: ProcessPoolExecutor | None = None
+        self._process_workers = 0
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._pending = 0
+        self._queue_wait = _Stat()
+        self._run_time = _Stat()
+        self._failed = 0
+
+    def set_process_backend(self, enabled: bool) -> None:
+        """Enable or disable the process-pool backend."""
+        if enabled and self._processes is None:
+            self._process_workers = min(os.cpu_count() or 1, MAX_PROCESS_WORKERS)
+            # spawn: forking a process full of Home Assistant threads is unsafe
+            self._processes = ProcessPoolExecutor(
+                self._process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=fontLoader.set_cache_dir,
+                initargs=(fontLoader.get_cache_dir(),),
+            )
+            self._slots = asyncio.Semaphore(self._process_workers + self.max_queue)
+            _LOGGER.info("Rendering with %s worker processes", self._process_workers)
+        elif not enabled and self._processes is not None:
+            self._shutdown_processes()
+
+    def _shutdown_processes(self) -> None:
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+            self._process_workers = 0
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+    async def async_run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """Run ``func`` in the thread pool and return its result."""
+        return await self._async_submit(self._threads, func, *args, **kwargs)
+
+    async def async_run_cpu(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run a picklable ``func`` in the process pool, or threads if disabled."""
+        if (processes := self._processes) is not None:
+            try:
+                return await self._async_submit(processes, func, *args)
+            except BrokenProcessPool:
+                _LOGGER.warning("Render worker processes died, falling back to threads")
+                if self._processes is processes:
+                    self._shutdown_processes()
+        return await self.async_run(func, *args)
+
+    async def _async_submit(
+        self, pool: Executor, func: Callable[..., _T], *args: Any, **kwargs: Any
+    ) -> _T:
+        submitted = time.monotonic()
+        async with self._slots:
+            self._pending += 1
+            try:
+                result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                    pool, functools.partial(_timed_call, func, *args, **kwargs)
+                )
+            except BaseException:
+                self._failed += 1
+                raise
+            finally:
+                self._pending -= 1
+        self._queue_wait.add(started - submitted)
+        self._run_time.add(finished - started)
+        return result
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return queue wait and run-time metrics for diagnostics."""
+        return {
+            "backend": "process" if self._processes is not None else "thread",
+            "max_workers": self.max_workers,
+            "process_workers": self._process_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self._run_time.count,
+            "failed": self._failed,
+            "queue_wait": self._queue_wait.as_dict(),
+            "run_time": self._run_time.as_dict(),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads and processes."""
+        self._shutdown_processes()
+        self._threads.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,270 @@
+"""Small persistent HTTP cache for remote images and icons."""
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "idotmatrix_http_cache"
+
+# Bodies kept on disk before least recently used entries are dropped
+MAX_BYTES = 16 * 1024 * 1024
+# Freshness when the server sends no Cache-Control/Expires at all
+DEFAULT_TTL = 3600
+# Heuristic freshness cap for responses that only carry Last-Modified
+MAX_HEURISTIC_TTL = 24 * 3600
+
+
+def get_http_cache(hass: HomeAssistant) -> HttpCache:
+    """Return the HTTP cache shared by all coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (cache := domain_data.get("_http_cache")) is None:
+        cache = domain_data["_http_cache"] = HttpCache(hass)
+    return cache
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Body of a cached (or freshly fetched) response."""
+
+    body: bytes
+    content_type: str
+    # ETag/Last-Modified, or a body digest; changes whenever the body does
+    version: str
+
+
+class HttpCache:
+    """HTTP GET cache honoring Cache-Control with conditional revalidation.
+
+    Fresh entries are served from disk without touching the network. Stale
+    entries are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged resource costs a 304 instead of a full download. Bodies are
+    stored under .storage/idotmatrix/http and capped at ``max_bytes``.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_bytes: int = MAX_BYTES) -> None:
+        self.hass = hass
+        self.max_bytes = max_bytes
+        self._dir = hass.config.path(STORAGE_DIR, DOMAIN, "http")
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._load_lock = asyncio.Lock()
+        # One shared fetch per URL, so layers using the same source don't race
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.errors = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return cache statistics for diagnostics."""
+        entries = self._entries or {}
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry["size"] for entry in entries.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "errors": self.errors,
+        }
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self._dir, hashlib.sha1(url.encode()).hexdigest())
+
+    async def _async_load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            async with self._load_lock:
+                if self._entries is None:
+                    data = await self._store.async_load()
+                    self._entries = (data or {}).get("entries", {})
+        return self._entries
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(lambda: {"entries": self._entries}, 5.0)
+
+    async def async_get(self, url: str, **kwargs: Any) -> CachedResponse | None:
+        """GET ``url`` through the cache; returns None on failure.
+
+        Concurrent plain requests for the same URL share one fetch.
+        """
+        if kwargs:
+            return await self._async_get(url, **kwargs)
+        if (task := self._inflight.get(url)) is None:
+            task = self.hass.async_create_task(self._async_get(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # A cancelled caller must not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _async_get(self, url: str, **kwargs: Any) -> CachedResponse | None:
+        entries = await self._async_load()
+        entry = entries.get(url)
+        now = time.time()
+
+        if entry is not None:
+            if entry["expires"] > now:
+                body = await self.hass.async_add_executor_job(_read, self._body_path(url))
+                if body is not None:
+                    self.hits += 1
+                    entry["accessed"] = now
+                    self._async_schedule_save()
+                    return self._response(entry, body)
+            # Stale (or body went missing): revalidate below
+            if not os.path.exists(self._body_path(url)):
+                entry = None
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.get(url, headers=headers, **kwargs) as resp:
+                if resp.status == 304 and entry is not None:
+                    body = await self.hass.async_add_executor_job(_read, self._body_path(url))
+                    if body is not None:
+                        self.revalidated += 1
+                        entry["expires"] = now + _freshness(resp.headers, now)
+                        entry["accessed"] = now
+                        self._async_schedule_save()
+                        return self._response(entry, body)
+                    # Body vanished between checks; fetch unconditionally
+                    return await self._async_get(url, **kwargs)
+                if resp.status != 200:
+                    self.errors += 1
+                    _LOGGER.warning("Failed to fetch %s (status %s)", url, resp.status)
+                    return None
+                body = await resp.read()
+                resp_headers = resp.headers
+        except Exception as exc:
+            self.errors += 1
+            _LOGGER.warning("Failed to fetch %s: %s", url, exc)
+            return None
+
+        self.misses += 1
+        new_entry = {
+            "etag": resp_headers.get("ETag"),
+            "last_modified": resp_headers.get("Last-Modified"),
+            "content_type": resp_headers.get("Content-Type", ""),
+            "digest": hashlib.sha1(body).hexdigest(),
+            "size": len(body),
+            "expires": now + _freshness(resp_headers, now),
+            "accessed": now,
+        }
+        if "no-store" in resp_headers.get("Cache-Control", "").lower():
+            entries.pop(url, None)
+            return self._response(new_entry, body)
+
+        entries[url] = new_entry
+        evicted = self._evict(keep=url)
+        try:
+            await self.hass.async_add_executor_job(self._write, url, body, evicted)
+        except OSError as exc:
+            # Still serve what was downloaded, just don't remember it
+            self.errors += 1
+            _LOGGER.warning("Failed to cache %s: %s", url, exc)
+            entries.pop(url, None)
+        self._async_schedule_save()
+        return self._response(new_entry, body)
+
+    @staticmethod
+    def _response(entry: dict[str, Any], body: bytes) -> CachedResponse:
+        return CachedResponse(
+            body=body,
+            content_type=entry.get("content_type", ""),
+            version=entry.get("etag") or entry.get("last_modified") or entry["digest"],
+        )
+
+    def _evict(self, keep: str) -> list[str]:
+        """Drop least recently used entries until under the byte cap."""
+        total = sum(entry["size"] for entry in self._entries.values())
+        evicted = []
+        for url, entry in sorted(self._entries.items(), key=lambda kv: kv[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            total -= entry["size"]
+            evicted.append(url)
+        for url in evicted:
+            del self._entries[url]
+        return evicted
+
+    def _write(self, url: str, body: bytes, evicted: list[str]) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        # A unique temp file per write, so concurrent writers never share one
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(body)
+            os.replace(tmp_path, self._body_path(url))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        for old in evicted:
+            try:
+                os.remove(self._body_path(old))
+            except OSError:
+                pass
+
+
+def _read(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as fp:
+            return fp.read()
+    except OSError:
+        return None
+
+
+def _freshness(headers, now: float) -> float:
+    """Return how many seconds a response may be served without revalidation."""
+    directives = {}
+    for part in headers.get("Cache-Control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+
+    if "no-cache" in directives or "no-store" in directives:
+        return 0
+    if "max-age" in directives:
+        try:
+            return max(0, int(directives["max-age"]) - int(headers.get("Age", 0) or 0))
+        except ValueError:
+            return 0
+    if expires := headers.get("Expires"):
+        try:
+            return max(0, email.utils.parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0
+    if last_modified := headers.get("Last-Modified"):
+        # RFC 9111 heuristic: 10% of the time since the last change
+        try:
+            age = now - email.utils.parsedate_to_datetime(last_modified).timestamp()
+            return min(max(0, age * 0.1), MAX_HEURISTIC_TTL)
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_TTL
@@ -0,0 +1,206 @@
+"""Iconify icon fetching with batched requests and a rasterized disk cache."""
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Iterable
+
+from PIL import Image
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN
+from .executor import get_render_executor
+
+_LOGGER = logging.getLogger(__name__)
+
+ICONIFY_API_URL = "https://api.iconify.design"
+# Iconify's default viewbox when neither the icon nor the collection sets one
+DEFAULT_VIEWBOX = 16
+
+_SAFE_NAME = re.compile(r"[^a-z0-9_-]")
+
+
+def get_iconify_icons(hass: HomeAssistant) -> IconifyIcons:
+    """Return the Iconify icon source shared by all coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (icons := domain_data.get("_iconify")) is None:
+        icons = domain_data["_iconify"] = IconifyIcons(hass)
+    return icons
+
+
+def is_iconify_ref(icon_ref: str) -> bool:
+    """Return True for ``prefix:name`` references served by Iconify."""
+    return ":" in icon_ref and not icon_ref.startswith(("http://", "https://", "/"))
+
+
+def svg_to_png(svg_data: bytes, size: int) -> bytes | None:
+    """Convert SVG bytes to PNG bytes (requires cairo)."""
+    try:
+        import cairosvg
+        return cairosvg.svg2png(
+            bytestring=svg_data,
+            output_width=size,
+            output_height=size,
+        )
+    except Exception:
+        return None
+
+
+class IconifyIcons:
+    """Iconify icons rasterized to alpha masks and persisted per (icon, size).
+
+    Missing icons are fetched with one collection request per prefix
+    (``/{prefix}.json?icons=a,b``), so a face with several icons costs a
+    handful of requests once and none after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._dir = hass.config.path(STORAGE_DIR, DOMAIN, "icons")
+        self._svg_error_logged = False
+
+    def _cache_path(self, icon_ref: str, size: int) -> str:
+        prefix, name = icon_ref.split(":", 1)
+        prefix = _SAFE_NAME.sub("_", prefix.lower())
+        name = _SAFE_NAME.sub("_", name.lower())
+        return os.path.join(self._dir, prefix, f"{name}-{size}.png")
+
+    async def async_render(self, icon_ref: str, size: int) -> Image.Image | None:
+        """Return a single icon as an "L" alpha mask."""
+        masks = await self.async_render_many([(icon_ref, size)])
+        return masks.get((icon_ref, size))
+
+    async def async_render_many(
+        self, requests: Iterable[tuple[str, int]]
+    ) -> dict[tuple[str, int], Image.Image | None]:
+        """Return alpha masks for many icons, batching network fetches."""
+        wanted = {(ref, size) for ref, size in requests if is_iconify_ref(ref)}
+        if not wanted:
+            return {}
+
+        results = await self.hass.async_add_executor_job(self._load_cached, wanted)
+        missing = [key for key in wanted if key not in results]
+        if not missing:
+            return results
+
+        by_prefix: dict[str, set[str]] = defaultdict(set)
+        for ref, _ in missing:
+            prefix, name = ref.split(":", 1)
+            by_prefix[prefix].add(name)
+
+        collections = await asyncio.gather(
+            *(self._async_fetch_collection(prefix, names) for prefix, names in by_prefix.items())
+        )
+        svgs: dict[str, bytes] = {}
+        for prefix, collection in zip(by_prefix, collections):
+            for name, svg in collection.items():
+                svgs[f"{prefix}:{name}"] = svg
+
+        rasterized = await get_render_executor(self.hass).async_run(self._rasterize, missing, svgs)
+        results.update(rasterized)
+        return results
+
+    def _load_cached(self, wanted: set[tuple[str, int]]) -> dict[tuple[str, int], Image.Image]:
+        """Load previously rasterized masks from disk."""
+        found = {}
+        for ref, size in wanted:
+            path = self._cache_path(ref, size)
+            if not os.path.exists(path):
+                continue
+            try:
+                with Image.open(path) as img:
+                    found[(ref, size)] = img.convert("L")
+            except Exception as exc:
+                _LOGGER.debug("Discarding unreadable icon cache %s: %s", path, exc)
+        return found
+
+    def _rasterize(
+        self, missing: list[tuple[str, int]], svgs: dict[str, bytes]
+    ) -> dict[tuple[str, int], Image.Image | None]:
+        """Rasterize SVGs to alpha masks and persist them."""
+        results: dict[tuple[str, int], Image.Image | None] = {}
+        for ref, size in missing:
+            svg = svgs.get(ref)
+            if svg is None:
+                results[(ref, size)] = None
+                continue
+            png_bytes = svg_to_png(svg, size)
+            if not png_bytes:
+                if not self._svg_error_logged:
+                    _LOGGER.warning(
+                        "SVG icon rendering unavailable; install cairo to enable SVG icons."
+                    )
+                    self._svg_error_logged = True
+                results[(ref, size)] = None
+                continue
+            mask = Image.open(io.BytesIO(png_bytes)).convert("RGBA").getchannel("A")
+            results[(ref, size)] = mask
+
+            path = self._cache_path(ref, size)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                mask.save(f"{path}.tmp", format="PNG")
+                os.replace(f"{path}.tmp", path)
+            except OSError as exc:
+                _LOGGER.debug("Failed to persist icon %s: %s", path, exc)
+        return results
+
+    async def _async_fetch_collection(self, prefix: str, names: set[str]) -> dict[str, bytes]:
+        """Fetch several icons of one collection as standalone SVG documents."""
+        from urllib.parse import quote
+
+        url = f"{ICONIFY_API_URL}/{quote(prefix, safe='-')}.json"
+        params = {"icons": ",".join(sorted(names))}
+        session = async_get_clientsession(self.hass)
+        try:
+            async with session.get(url, params=params, ssl=False) as resp:
+                if resp.status != 200:
+                    _LOGGER.warning(
+                        "Failed to fetch Iconify icons %s:%s (status %s)",
+                        prefix, ",".join(sorted(names)), resp.status,
+                    )
+                    return {}
+                data = await resp.json(content_type=None)
+        except Exception as exc:
+            _LOGGER.warning("Failed to fetch Iconify collection %s: %s", prefix, exc)
+            return {}
+
+        if not isinstance(data, dict):
+            return {}
+        for name in data.get("not_found", []):
+            _LOGGER.warning("Unknown Iconify icon: %s:%s", prefix, name)
+
+        icons = data.get("icons", {})
+        aliases = data.get("aliases", {})
+        svgs = {}
+        for name in names:
+            icon = icons.get(name)
+            # Follow alias chains (transformations like flips are not applied)
+            seen = set()
+            target = name
+            while icon is None and target in aliases and target not in seen:
+                seen.add(target)
+                target = aliases[target].get("parent")
+                icon = icons.get(target)
+            if icon and "body" in icon:
+                svgs[name] = self._build_svg(icon, data)
+        return svgs
+
+    @staticmethod
+    def _build_svg(icon: dict, collection: dict) -> bytes:
+        """Wrap an Iconify icon body in an SVG document."""
+        left = icon.get("left", collection.get("left", 0))
+        top = icon.get("top", collection.get("top", 0))
+        width = icon.get("width", collection.get("width", DEFAULT_VIEWBOX))
+        height = icon.get("height", collection.get("height", DEFAULT_VIEWBOX))
+        return (
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'viewBox="{left} {top} {width} {height}">{icon["body"]}</svg>'
+        ).encode("utf-8")
@@ -0,0 +1,298 @@
+"""Material Design Icons rendering backed by an on-disk asset cache."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from PIL import Image, ImageDraw, ImageFont
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN
+from .executor import get_render_executor
+
+_LOGGER = logging.getLogger(__name__)
+
+MDI_META_URL = "https://raw.githubusercontent.com/Templarian/MaterialDesign/master/meta.json"
+MDI_FONT_URL = "https://raw.githubusercontent.com/Templarian/MaterialDesign-Webfont/master/fonts/materialdesignicons-webfont.ttf"
+
+# Bump when the on-disk index layout changes
+INDEX_VERSION = 1
+INDEX_FILENAME = "index.json"
+FONT_FILENAME = "materialdesignicons-webfont.ttf"
+# Cached assets are revalidated in the background at most this often
+REVALIDATE_INTERVAL = 7 * 24 * 3600
+# Retry interval while no usable copy exists (first download failed)
+RETRY_INTERVAL = 300
+
+
+def get_mdi_icons(hass: HomeAssistant) -> MdiIcons:
+    """Return the MDI icon source shared by all coordinators."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (icons := domain_data.get("_mdi")) is None:
+        icons = domain_data["_mdi"] = MdiIcons(hass)
+    return icons
+
+
+class MdiIcons:
+    """Lazily loaded MDI webfont and name index, cached in HA's storage dir.
+
+    Nothing is loaded at startup. The first ``mdi:`` request reads the
+    compact index and font from disk; only if they are missing are the
+    assets downloaded. Cached assets are revalidated with conditional
+    requests (ETag / Last-Modified) in the background, so icons keep
+    rendering offline.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._dir = hass.config.path(STORAGE_DIR, DOMAIN, "mdi")
+        self._index: dict[str, int] | None = None
+        self._validators: dict[str, dict[str, str]] = {}
+        self._checked_at = 0.0
+        self._fonts: dict[int, ImageFont.FreeTypeFont] = {}
+        self._lock = asyncio.Lock()
+        self._load_attempted = False
+        self._revalidate_task: asyncio.Task | None = None
+        self._error_logged = False
+        self._unknown_icons: set[str] = set()
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self._dir, INDEX_FILENAME)
+
+    @property
+    def _font_path(self) -> str:
+        return os.path.join(self._dir, FONT_FILENAME)
+
+    async def async_render(self, icon_name: str, size: int) -> Image.Image | None:
+        """Render an MDI icon as an "L" alpha mask."""
+        if not await self._async_ensure_loaded():
+            return None
+
+        codepoint = self._index.get(icon_name)
+        if not codepoint:
+            if icon_name not in self._unknown_icons:
+                _LOGGER.warning("Unknown MDI icon: %s", icon_name)
+                self._unknown_icons.add(icon_name)
+            return None
+
+        font = self._fonts.get(size)
+        if not font:
+            font = await self.hass.async_add_executor_job(
+                ImageFont.truetype, self._font_path, size
+            )
+            self._fonts[size] = font
+
+        return await get_render_executor(self.hass).async_run(
+            _draw_glyph, font, codepoint, size
+        )
+
+    async def _async_ensure_loaded(self) -> bool:
+        """Load the index from disk, downloading the assets if needed."""
+        if self._index is not None:
+            self._async_schedule_revalidate()
+            return True
+
+        async with self._lock:
+            if self._index is not None:
+                return True
+            if self._load_attempted:
+                # Download already failed once this run; retried on revalidation
+                self._async_schedule_revalidate()
+                return False
+            self._load_attempted = True
+
+            if await self.hass.async_add_executor_job(self._load_from_disk):
+                self._async_schedule_revalidate()
+                return True
+
+            return await self._async_download(conditional=False)
+
+    def _load_from_disk(self) -> bool:
+        """Read the compact index; return False if the cache is unusable."""
+        try:
+            with open(self._index_path, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or not os.path.exists(self._font_path):
+            return False
+
+        self._index = data.get("icons", {})
+        self._validators = data.get("validators", {})
+        self._checked_at = data.get("checked_at", 0.0)
+        _LOGGER.debug("Loaded %d MDI icons from %s", len(self._index), self._dir)
+        return True
+
+    def _write_to_disk(
+        self,
+        index: dict[str, int],
+        validators: dict[str, dict[str, str]],
+        font_bytes: bytes | None,
+    ) -> None:
+        """Persist the font (if changed) and the compact index atomically."""
+        os.makedirs(self._dir, exist_ok=True)
+        if font_bytes is not None:
+            tmp_font = f"{self._font_path}.tmp"
+            with open(tmp_font, "wb") as fp:
+                fp.write(font_bytes)
+            os.replace(tmp_font, self._font_path)
+
+        tmp_index = f"{self._index_path}.tmp"
+        with open(tmp_index, "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "checked_at": self._checked_at,
+                    "validators": validators,
+                    "icons": index,
+                },
+                fp,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_index, self._index_path)
+
+    @staticmethod
+    def _build_index(meta_data: Any) -> dict[str, int] | None:
+        """Reduce MDI meta.json to a compact {name: codepoint} index."""
+        if not isinstance(meta_data, list):
+            return None
+        index: dict[str, int] = {}
+        for item in meta_data:
+            if isinstance(item, dict) and "name" in item and "codepoint" in item:
+                try:
+                    index[item["name"]] = int(item["codepoint"], 16)
+                except (TypeError, ValueError):
+                    continue
+        return index
+
+    @callback
+    def _async_schedule_revalidate(self) -> None:
+        """Revalidate cached assets in the background when they are stale."""
+        interval = REVALIDATE_INTERVAL if self._index is not None else RETRY_INTERVAL
+        if time.time() - self._checked_at < interval:
+            return
+        if self._revalidate_task and not self._revalidate_task.done():
+            return
+        self._revalidate_task = self.hass.async_create_background_task(
+            self._async_revalidate(), "idotmatrix_mdi_revalidate"
+        )
+
+    async def _async_revalidate(self) -> None:
+        async with self._lock:
+            await self._async_download(conditional=self._index is not None)
+
+    async def _async_fetch(
+        self, session, url: str, conditional: bool
+    ) -> tuple[int, bytes | None, dict[str, str] | None]:
+        """GET a URL, sending stored validators when ``conditional``.
+
+        Returns the status, the body and the new validators of a 200
+        response; the caller commits them once the asset is stored.
+        """
+        headers = {}
+        validators = self._validators.get(url, {})
+        if conditional:
+            if etag := validators.get("etag"):
+                headers["If-None-Match"] = etag
+            if last_modified := validators.get("last_modified"):
+                headers["If-Modified-Since"] = last_modified
+
+        async with session.get(url, headers=headers, ssl=False) as resp:
+            if resp.status != 200:
+                return resp.status, None, None
+            body = await resp.read()
+            return 200, body, {
+                key: value
+                for key, value in (
+                    ("etag", resp.headers.get("ETag")),
+                    ("last_modified", resp.headers.get("Last-Modified")),
+                )
+                if value
+            }
+
+    async def _async_download(self, conditional: bool) -> bool:
+        """Fetch (or revalidate) the assets and persist them to disk."""
+        session = async_get_clientsession(self.hass)
+        # Record the attempt up front so an offline host doesn't retry every render
+        self._checked_at = time.time()
+        try:
+            meta_status, meta_body, meta_validators = await self._async_fetch(
+                session, MDI_META_URL, conditional
+            )
+            font_status, font_body, font_validators = await self._async_fetch(
+                session, MDI_FONT_URL, conditional
+            )
+        except Exception as exc:
+            if not self._error_logged:
+                _LOGGER.warning("Failed to load MDI assets: %s", exc)
+                self._error_logged = True
+            return self._index is not None
+
+        for name, status in (("metadata", meta_status), ("font", font_status)):
+            if status not in (200, 304):
+                if not self._error_logged:
+                    _LOGGER.warning("Failed to fetch MDI %s (status %s)", name, status)
+                    self._error_logged = True
+                return self._index is not None
+
+        index = self._index
+        if meta_body is not None:
+            try:
+                index = self._build_index(json.loads(meta_body))
+            except ValueError:
+                index = None
+            if not index:
+                _LOGGER.warning("Ignoring malformed MDI metadata")
+                return self._index is not None
+
+        if index is None:
+            # Both 304 but nothing on disk; force a full fetch next time
+            self._validators = {}
+            return False
+
+        # Validators are only committed together with the assets they describe,
+        # so a failure on either one never leaves a mismatched index behind
+        validators = dict(self._validators)
+        if meta_validators is not None:
+            validators[MDI_META_URL] = meta_validators
+        if font_validators is not None:
+            validators[MDI_FONT_URL] = font_validators
+        try:
+            await self.hass.async_add_executor_job(
+                self._write_to_disk, index, validators, font_body
+            )
+        except OSError as exc:
+            _LOGGER.warning("Failed to store MDI assets: %s", exc)
+            return self._index is not None
+
+        if index is not self._index:
+            self._index = index
+            self._unknown_icons.clear()
+        if font_body is not None:
+            self._fonts.clear()
+        self._validators = validators
+        _LOGGER.debug(
+            "MDI assets %s", "updated" if meta_body or font_body else "still current"
+        )
+        return True
+
+
+def _draw_glyph(font: ImageFont.FreeTypeFont, codepoint: int, size: int) -> Image.Image:
+    """Draw one icon glyph centered on a size x size "L" mask."""
+    icon_img = Image.new("L", (size, size), 0)
+    draw = ImageDraw.Draw(icon_img)
+    char = chr(codepoint)
+
+    bbox = draw.textbbox((0, 0), char, font=font)
+    x = (size - (bbox[2] - bbox[0])) // 2 - bbox[0]
+    y = (size - (bbox[3] - bbox[1])) // 2 - bbox[1]
+    draw.text((x, y), char, font=font, fill=255)
+    return icon_img
@@ -0,0 +1,175 @@
+"""Choose the cheapest protocol for showing a static text on the panel.
+
+The device can show a short static string either natively, from glyph
+blocks sent with the text protocol, or as an uploaded PNG or single-frame
+GIF of the same pixels. Which one needs the least airtime depends on the
+font, the text and the measured link rate, so the candidates are built and
+costed side by side once; callers remember the winner and afterwards only
+build that one. Everything here is free of Home Assistant state and
+can run in a worker process.
+"""
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from .client.modules.gif import Gif
+from .client.modules.image import DEFAULT_LINK_RATE, Image as IDMImage, encode_frame
+from .client.modules.text import Text
+from .render import PanelFrame
+
+METHOD_TEXT = "text"
+METHOD_PNG = "png"
+METHOD_GIF = "gif"
+
+# Fixed cost of one ConnectionManager.send call (pacing plus settle delay)
+SEND_OVERHEAD = 0.06
+# Glyph block geometry of the text protocol, see Text.setMode
+BLOCK_WIDTH = 16
+BLOCK_HEIGHT = 32
+BLOCK_SEPARATOR = b"\x05\xff\xff\xff"
+# Text color modes an image can reproduce: white and custom color
+_PLAIN_COLOR_MODES = {0: (255, 255, 255)}
+# Preference between candidates of equal cost, so ties never flip
+_METHOD_ORDER = (METHOD_TEXT, METHOD_PNG, METHOD_GIF)
+
+
+@dataclass(slots=True)
+class Candidate:
+    """One way of showing the text, with everything needed to send it."""
+
+    method: str
+    payloads: tuple[bytes, ...]
+    # ConnectionManager.send calls, including mode switches
+    sends: int
+    # PNG candidates: pixels (and PNG), sent through the framebuffer diff
+    frame: PanelFrame | None = None
+
+    @property
+    def size(self) -> int:
+        return sum(map(len, self.payloads))
+
+    def cost(self, link_rate: float | None) -> float:
+        """Estimated seconds on the link, from bytes and per-send overhead."""
+        return self.sends * SEND_OVERHEAD + self.size / (link_rate or DEFAULT_LINK_RATE)
+
+
+def plan_static_text(
+    text: str, options: dict, screen_size: int, link_rate: float | None = None
+) -> list[Candidate]:
+    """Return the ways of showing a static text, cheapest first.
+
+    ``options`` are the keyword arguments of ``Text.setMode``. The text
+    candidate is always present. Image candidates are only added when they
+    show exactly the same pixels: the text holds still (mode 0), is white
+    or a single custom color, and its glyph blocks fit on the panel.
+    Ranking is deterministic: estimated link time, then a fixed method
+    preference, so callers can remember the winner for the same input.
+    """
+    candidates = [
+        build_candidate(method, text, options, screen_size)
+        for method in _METHOD_ORDER
+    ]
+    candidates = [candidate for candidate in candidates if candidate is not None]
+    candidates.sort(
+        key=lambda candidate: (
+            round(candidate.cost(link_rate), 4),
+            _METHOD_ORDER.index(candidate.method),
+        )
+    )
+    return candidates
+
+
+def build_candidate(
+    method: str, text: str, options: dict, screen_size: int, encode: bool = True
+) -> Candidate | None:
+    """Build one candidate, or None if that method can't show the text exactly.
+
+    With ``encode`` False a PNG candidate only carries its pixels and no
+    payloads; the caller encodes it through the payload cache when needed.
+    """
+    if method == METHOD_TEXT:
+        packets = Text().buildPackets(text, **options)
+        return Candidate(METHOD_TEXT, tuple(packets), len(packets))
+
+    color = _plain_color(options)
+    if (
+        options.get("text_mode") != 0
+        or color is None
+        or options.get("compact_mode")
+        or screen_size != BLOCK_HEIGHT
+    ):
+        return None
+    frame = _render_blocks(text, options, color, screen_size)
+    if frame is None:
+        return None
+
+    if method == METHOD_PNG:
+        panel_frame = PanelFrame(frame.size, frame.tobytes())
+        if not encode:
+            return Candidate(METHOD_PNG, (), 0, panel_frame)
+        panel_frame.png = encode_frame(frame)
+        payloads = IDMImage().framePNG(panel_frame.png)
+        # plus the DIY mode switch
+        return Candidate(METHOD_PNG, payloads, len(payloads) + 1, panel_frame)
+
+    payloads = Gif()._createPayloads(_encode_gif(frame))
+    return Candidate(
+        METHOD_GIF, tuple(bytes(chunk) for chunk in payloads), len(payloads)
+    )
+
+
+def _plain_color(options: dict) -> tuple[int, int, int] | None:
+    """Return the single text color, or None for device-side color effects."""
+    color_mode = options.get("text_color_mode", 1)
+    if color_mode == 1:
+        return tuple(options.get("text_color", (255, 0, 0)))
+    return _PLAIN_COLOR_MODES.get(color_mode)
+
+
+def _render_blocks(
+    text: str, options: dict, color: tuple[int, int, int], screen_size: int
+) -> Image.Image | None:
+    """Draw the glyph blocks the text protocol would send, side by side.
+
+    Returns None if they don't fit on the panel.
+    """
+    text_module = Text()
+    font = text_module._loadFont(options.get("font_path"), options.get("font_size", 16))
+    blocks = list(
+        text_module._iterBitmaps(
+            text,
+            font,
+            BLOCK_WIDTH,
+            BLOCK_HEIGHT,
+            BLOCK_SEPARATOR,
+            options.get("spacing", 0),
+            options.get("proportional", True),
+        )
+    )
+    if not blocks or len(blocks) * BLOCK_WIDTH > screen_size:
+        return None
+
+    bits = np.frombuffer(
+        b"".join(block[len(BLOCK_SEPARATOR):] for block in blocks), dtype=np.uint8
+    )
+    # blocks are packed LSB first, one row of BLOCK_WIDTH pixels after the other
+    lit = np.unpackbits(bits, bitorder="little").reshape(len(blocks), BLOCK_HEIGHT, BLOCK_WIDTH)
+    mask = np.zeros((screen_size, screen_size), dtype=np.uint8)
+    mask[:BLOCK_HEIGHT, : len(blocks) * BLOCK_WIDTH] = np.hstack(lit) * 255
+
+    frame = Image.new("RGB", (screen_size, screen_size), (0, 0, 0))
+    frame.paste(color, mask=Image.fromarray(mask, "L"))
+    return frame
+
+
+def _encode_gif(frame: Image.Image) -> bytes:
+    """Encode a frame with few colors as a GIF with a minimal palette."""
+    gif_buffer = io.BytesIO()
+    frame.convert("P", palette=Image.Palette.ADAPTIVE).save(
+        gif_buffer, format="GIF", optimize=True
+    )
+    return gif_buffer.getvalue()
@@ -0,0 +1,365 @@
+"""Rasterization of resolved display faces.
+
+Everything in here is synchronous and free of Home Assistant state: the
+coordinator resolves templates and fetches icons/images first, then hands
+the resolved layers to ``render_face``.
+"""
+from __future__ import annotations
+
+import io
+import logging
+from dataclasses import dataclass
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from .client import fontLoader
+from .client.modules.image import prepare_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modes Image.reduce supports directly
+_REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "RGBa", "La", "I", "F"}
+
+
+@dataclass(slots=True)
+class PanelFrame:
+    """A frame ready for the panel: its RGB pixels, and their PNG if already encoded.
+
+    Without ``png`` the frame is encoded on demand through the Image
+    module's payload cache, so recurring frames skip the encoder.
+    """
+
+    size: tuple[int, int]
+    pixels: bytes
+    png: bytes | None = None
+
+    def image(self) -> Image.Image:
+        """Return the pixels as an RGB image."""
+        return Image.frombytes("RGB", self.size, self.pixels)
+
+
+def prepare_panel_frame(
+    image: Image.Image,
+    screen_size: int,
+    colors: int | None = None,
+    dither: str | None = None,
+) -> PanelFrame:
+    """Fit a rendered image to the panel."""
+    # Quantized frames go out as RGB, encode_frame finds their exact palette again
+    frame = prepare_frame(image, screen_size, colors, dither).convert("RGB")
+    return PanelFrame(frame.size, frame.tobytes())
+
+
+def render_face_frame(
+    items: list[dict],
+    screen_size: int,
+    colors: int | None = None,
+    dither: str | None = None,
+) -> PanelFrame:
+    """Render and prepare a face in one worker job.
+
+    Only the resolved items go to the worker and only the pixels come
+    back, instead of pickling the image for every step. Encoding is left
+    to the caller, which can often reuse a cached payload or send a diff.
+    """
+    return prepare_panel_frame(render_face(items, screen_size), screen_size, colors, dither)
+
+
+def render_multiline_frame(text: str, settings: dict) -> PanelFrame:
+    """Render and prepare multiline text in one worker job."""
+    screen_size = int(settings.get("screen_size", 32))
+    return prepare_panel_frame(render_multiline_text(text, settings), screen_size)
+
+
+def render_face(items: list[dict], screen_size: int) -> Image.Image:
+    """Draw resolved layers onto a new RGB canvas.
+
+    Each item holds the original ``layer`` dict plus resolved values:
+    ``content`` (text), ``icon`` (alpha mask) and ``image`` (RGBA tile from
+    ``decode_tile``).
+    """
+    canvas = Image.new("RGB", (screen_size, screen_size), (0, 0, 0))
+    draw = ImageDraw.Draw(canvas)
+
+    for item in items:
+        layer = item["layer"]
+        l_type = layer.get("type", "text")
+
+        if l_type == "text":
+            _draw_text_layer(canvas, draw, item, screen_size)
+        elif l_type == "image":
+            _draw_image_layer(canvas, item)
+
+    return canvas
+
+
+def _draw_text_layer(canvas: Image.Image, draw: ImageDraw.ImageDraw, item: dict, screen_size: int) -> None:
+    layer = item["layer"]
+    x = layer.get("x", 0)
+    y = layer.get("y", 0)
+    color = tuple(layer.get("color", [255, 255, 255]))
+
+    # Render icon if present
+    if icon_mask := item.get("icon"):
+        w, h = icon_mask.size
+        canvas.paste(color, (x, y, x + w, y + h), mask=icon_mask)
+
+    content = item.get("content")
+    # Skip empty content
+    if not content:
+        return
+
+    # Render Text using LAYER settings only (not global text_settings)
+    font_name = layer.get("font", "Rain-DRM3.otf")
+    font_size = int(layer.get("font_size", 10))
+    spacing_x = int(layer.get("spacing_x", 1))
+    blur = int(layer.get("blur", 5))
+
+    # Resolve font path
+    font_path = fontLoader.resolve_font_path(font_name)
+
+    try:
+        font = fontLoader.load_font(font_path, font_size)
+    except Exception:
+        font = ImageFont.load_default()
+
+    if fontLoader.is_bitmap_font(font):
+        # Bitmap fonts are never antialiased: draw straight onto the canvas
+        current_x = x
+        for char in str(content):
+            draw.text((current_x, y), char, font=font, fill=color)
+            current_x += int(font.getlength(char)) + spacing_x
+        return
+
+    # Create separate RGBA layer for text to apply blur/sharpness
+    text_layer = Image.new("RGBA", (screen_size, screen_size), (0, 0, 0, 0))
+    text_draw = ImageDraw.Draw(text_layer)
+
+    # Character-by-character rendering with custom spacing
+    current_x = x
+    for char in str(content):
+        text_draw.text((current_x, y), char, font=font, fill=(255, 255, 255, 255))
+        # Get character width
+        try:
+            bbox = font.getbbox(char)
+            char_width = bbox[2] - bbox[0] if bbox else font.getlength(char)
+        except Exception:
+            char_width = font_size // 2
+        current_x += int(char_width) + spacing_x
+
+    # Apply blur/sharpness effect (0=Sharp, 5=Normal, 10=Blur)
+    if blur < 5:
+        # Apply sharpening via contrast enhancement on alpha channel
+        a = text_layer.getchannel("A")
+        gain = 1.0 + ((5 - blur) * 2.0)
+        def apply_contrast(p):
+            v = (p - 128) * gain + 128
+            return max(0, min(255, int(v)))
+        a = a.point(apply_contrast)
+        text_layer.putalpha(a)
+    elif blur > 5:
+        # Apply blur effect
+        blur_amount = (blur - 5) * 0.5  # 0.5 to 2.5 radius
+        text_layer = text_layer.filter(ImageFilter.GaussianBlur(radius=blur_amount))
+
+    # Composite text onto canvas with color
+    canvas.paste(color, (0, 0, screen_size, screen_size), mask=text_layer.getchannel("A"))
+
+
+def _draw_image_layer(canvas: Image.Image, item: dict) -> None:
+    tile = item.get("image")
+    if tile is None:
+        return
+
+    layer = item["layer"]
+    try:
+        canvas.paste(tile, (layer.get("x", 0), layer.get("y", 0)), tile)
+    except Exception as e:
+        _LOGGER.error(f"Failed to process image layer: {e}")
+
+
+def render_multiline_text(text: str, settings: dict) -> Image.Image:
+    """Word-wrap text onto a screen-sized RGB image using the text settings."""
+    screen_size = int(settings.get("screen_size", 32))
+    font_name = settings.get("font")
+    color = tuple(settings.get("color", (255, 0, 0)))
+    spacing = int(settings.get("spacing", 1))
+    spacing_y = int(settings.get("spacing_y", 1))
+    blur = int(settings.get("blur", 5))
+
+    # Resolve font path
+    font_path = fontLoader.resolve_font_path(font_name)
+
+    # Determine font size and max scanning range if autosize is on
+    initial_font_size = int(settings.get("font_size", 10))
+    target_font_size = initial_font_size
+
+    if settings.get("autosize", False) and not fontLoader.is_bdf(font_path):
+        # Start from user's size or 32, whichever is reasonable, and shrink until fit
+        # Or always start large? Let's start from current size and shrink, 
+        # OR start from 32 (max) to find biggest possible fit? "Perfectly" usually means "Maximize".
+        # Let's try to Maximize: Start at 32 (or screen_size) down to 6.
+        start_size = screen_size
+        end_size = 6
+    else:
+        # Single pass
+        start_size = initial_font_size
+        end_size = initial_font_size
+
+    font_path_to_use = font_path
+
+    # Iterative resizing loop
+    for s in range(start_size, end_size - 1, -1):
+        target_font_size = s
+        try:
+            # BDF fonts are fixed size, so autosize runs a single pass for them
+            font = fontLoader.load_font(font_path_to_use, s)
+        except Exception:
+            font = ImageFont.load_default()
+
+        # Pixel-based Word Wrapping (Simulated for check)
+        words = text.split(' ')
+        lines = []
+        current_line = []
+
+        def get_word_width(word):
+            if not word: return 0
+            w = 0
+            for i, char in enumerate(word):
+                bbox = font.getbbox(char)
+                char_w = (bbox[2] - bbox[0]) if bbox else font.getlength(char)
+                w += char_w + spacing
+            return w - spacing
+
+        # Recalculate space width for this font size
+        try:
+            space_bbox = font.getbbox(" ")
+            space_w = (space_bbox[2] - space_bbox[0]) if space_bbox else font.getlength(" ")
+        except:
+            space_w = 4
+        space_width = space_w + spacing
+        if space_width < 1: space_width = 1
+
+        current_line_width = 0
+
+        for word in words:
+            word_width = get_word_width(word)
+            if current_line_width + word_width <= screen_size:
+                current_line.append(word)
+                current_line_width += word_width + space_width
+            else:
+                if current_line:
+                    lines.append(current_line)
+                    current_line = []
+                    current_line_width = 0
+                current_line.append(word)
+                current_line_width = word_width + space_width
+        if current_line:
+            lines.append(current_line)
+
+        # Check Height
+        ascent, descent = fontLoader.font_metrics(font)
+        line_height = ascent + descent + spacing_y
+        total_height = len(lines) * line_height
+
+        # If autosize is OFF, we accept the first pass (initial_font_size)
+        if not settings.get("autosize", False):
+            break
+
+        # If autosize is ON, check if it fits
+        if total_height <= screen_size and all(get_word_width(w) <= screen_size for w in words):
+             # Fits!
+             break
+
+    # Draw lines using chosen target_font_size
+    text_layer = Image.new("RGBA", (screen_size, screen_size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(text_layer)
+
+    y = (screen_size - total_height) // 2 if settings.get("autosize", False) else 0 # Center vertically if autosizing
+    if y < 0: y = 0
+
+    for line_words in lines:
+        if y >= screen_size: break
+        # Center Horizontally?
+        # Standard wrapper is left aligned. Perfect fit usually implies Center/Center.
+        # Let's calculate line width for centering
+        line_w = 0
+        for i, w in enumerate(line_words):
+             line_w += get_word_width(w)
+             if i < len(line_words) - 1: line_w += space_width
+
+        x = (screen_size - line_w) // 2 if settings.get("autosize", False) else 0
+        if x < 0: x = 0
+
+        for i, word in enumerate(line_words):
+            for char in word:
+                if x >= screen_size: break
+                draw.text((x, y), char, font=font, fill=(255, 255, 255, 255))
+                bbox = font.getbbox(char)
+                char_w = (bbox[2] - bbox[0]) if bbox else font.getlength(char)
+                x += char_w + spacing
+            if i < len(line_words) - 1:
+                 x += space_width
+        y += line_height
+
+    if blur < 5 and not fontLoader.is_bitmap_font(font):
+         r, g, b, a = text_layer.split()
+         gain = 1.0 + ((5 - blur) * 2.0) 
+         def apply_contrast(p):
+             v = (p - 128) * gain + 128
+             return max(0, min(255, int(v)))
+         a = a.point(apply_contrast)
+         text_layer.putalpha(a)
+
+    final_image = Image.new("RGB", (screen_size, screen_size), (0, 0, 0))
+    r, g, b, a = text_layer.split()
+    colored_text = Image.new("RGB", (screen_size, screen_size), color)
+    final_image.paste(colored_text, mask=a)
+    return final_image
+
+
+def decode_tile(source: str | bytes, size: tuple[int, int] | None) -> Image.Image | None:
+    """Decode an image file or buffer into a ready-to-paste RGBA tile."""
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            if size:
+                img = shrink_for_target(img, size)
+            tile = img.convert("RGBA")
+        # Resize if size provided
+        if size and tile.size != size:
+            tile = tile.resize(size)
+        return tile
+    except Exception as e:
+        _LOGGER.error(f"Failed to process image layer: {e}")
+        return None
+
+
+def decode_icon(data: bytes, size: int) -> Image.Image:
+    """Decode an icon file into a size x size "L" alpha mask.
+
+    Raises if the data can't be decoded.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img = shrink_for_target(img, (size, size))
+        icon_img = img.convert("RGBA")
+    if icon_img.size != (size, size):
+        icon_img = icon_img.resize((size, size))
+    return icon_img.getchannel("A")
+
+
+def shrink_for_target(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Cheaply bring a large source close to the target size before resampling.
+
+    JPEGs are decoded at a reduced DCT scale via ``draft`` (never below the
+    target), other formats get an integer box ``reduce`` that keeps at least
+    twice the target resolution for the final high-quality resize.
+    """
+    if img.format == "JPEG":
+        img.draft(img.mode, size)
+
+    factor = min(img.width // (size[0] * 2), img.height // (size[1] * 2))
+    if factor >= 2:
+        if img.mode not in _REDUCIBLE_MODES:
+            img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+        img = img.reduce(factor)
+    return img
@@ -22,6 +22,7 @@ async def async_setup_entry(
         IDotMatrixMultiline(coordinator, entry),
         IDotMatrixAutosize(coordinator, entry),
         IDotMatrixClockDate(coordinator, entry),
+        IDotMatrixFunTextGif(coordinator, entry),
     ])
 
 class IDotMatrixAutosize(IDotMatrixEntity, SwitchEntity):
@@ -149,3 +150,29 @@ class IDotMatrixMultiline(IDotMatrixEntity, SwitchEntity):
         """Turn the switch off."""
         self.coordinator.text_settings["multiline"] = False
         self.async_write_ha_state()
+
+class IDotMatrixFunTextGif(IDotMatrixEntity, SwitchEntity):
+    """Switch to play Fun Text as one GIF looped by the panel."""
+
+    _attr_icon = "mdi:file-gif-box"
+    _attr_name = "Fun Text as GIF"
+    _attr_entity_category = EntityCategory.CONFIG
+    
+    @property
+    def unique_id(self) -> str:
+        return f"{self._mac}_fun_text_gif"
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if switch is on."""
+        return self.coordinator.text_settings.get("fun_text_gif", False)
+
+    async def async_turn_on(self, **kwargs) -> None:
+        """Turn the switch on."""
+        self.coordinator.text_settings["fun_text_gif"] = True
+        self.async_write_ha_state()
+
+    async def async_turn_off(self, **kwargs) -> None:
+        """Turn the switch off."""
+        self.coordinator.text_settings["fun_text_gif"] = False
+        self.async_write_ha_state()
@@ -1,7 +1,9 @@
 """Text platform for iDotMatrix."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import random
 
 from homeassistant.components.text import TextEntity
 from homeassistant.config_entries import ConfigEntry
@@ -13,6 +15,17 @@ from .entity import IDotMatrixEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+FUN_TEXT_PALETTE = [
+    [255, 0, 0],
+    [0, 255, 0],
+    [0, 120, 255],
+    [160, 0, 255],
+    [255, 255, 255],
+    [255, 120, 0],
+    [255, 0, 170],
+    [0, 255, 220],
+]
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -54,6 +67,7 @@ class IDotMatrixFunText(IDotMatrixEntity, TextEntity):
 
     _attr_icon = "mdi:party-popper"
     _attr_name = "Fun Text"
+    _animation: asyncio.Task | None = None
     
     @property
     def unique_id(self) -> str:
@@ -71,41 +85,55 @@ class IDotMatrixFunText(IDotMatrixEntity, TextEntity):
         # Use simple default text if empty, similar to user script logic
         input_text = value if value else "How did I end up here?"
         
-        # Spawn the animation task
-        self.hass.async_create_task(self._animate_text(input_text))
+        # Replace a running animation instead of interleaving with it
+        self._cancel_animation()
+        self._animation = self.hass.async_create_task(self._animate_text(input_text))
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the animation when the entity goes away."""
+        self._cancel_animation()
+        await super().async_will_remove_from_hass()
+
+    def _cancel_animation(self) -> None:
+        if self._animation is not None and not self._animation.done():
+            self._animation.cancel()
+        self._animation = None
 
     async def _animate_text(self, text: str):
-        """Run the animation loop."""
-        import asyncio
-        import random
-        
+        """Run the animation loop.
+
+        All words are rendered up front, so playback only sends. Words are
+        sent on a fixed monotonic schedule: a slow send delays its own word
+        but not the ones after it, so the cadence doesn't drift. In GIF mode
+        the words are compiled into one animation the panel loops instead.
+        """
         words = text.split()
-        palette = [
-            [255, 0, 0],
-            [0, 255, 0],
-            [0, 120, 255],
-            [160, 0, 255],
-            [255, 255, 255],
-            [255, 120, 0],
-            [255, 0, 170],
-            [0, 255, 220]
-        ]
-        
-        for word in words:
-            color = random.choice(palette)
-            
-            # Update Settings
-            self.coordinator.text_settings["color"] = color
-            self.coordinator.text_settings["current_text"] = word
-            
-            # Send to Device
-            await self.coordinator.async_update_device()
-            
-            # Delay (Adjustable, Default 400ms)
-            delay = self.coordinator.text_settings.get("fun_text_delay", 0.4)
-            await asyncio.sleep(delay)
-            
-        # Final update to ensure state is consistent (optional config choice)
-        # Maybe show the full sentence at the end? Or leave the last word?
-        # User script leaves the last word. We'll stick to that "exactly same thing".
+        if not words:
+            return
+        colors = [random.choice(FUN_TEXT_PALETTE) for _ in words]
+        # Delay (Adjustable, Default 400ms)
+        delay = float(self.coordinator.text_settings.get("fun_text_delay", 0.4))
+
+        if self.coordinator.text_settings.get("fun_text_gif", False):
+            # One upload, then the panel loops the sentence on its own
+            await self.coordinator.async_upload_text_animation(words, colors, delay)
+            return
+
+        frames = await asyncio.gather(
+            *(
+                self.coordinator.async_prepare_text(word, color=color)
+                for word, color in zip(words, colors)
+            )
+        )
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for index, frame in enumerate(frames):
+            await asyncio.sleep(max(0.0, start + index * delay - loop.time()))
+            await self.coordinator.async_send_prepared(frame)
 
+        # User script leaves the last word, persist that once at the end
+        self.coordinator.text_settings["color"] = colors[-1]
+        self.coordinator.text_settings["current_text"] = words[-1]
+        self.coordinator.async_set_updated_data(self.coordinator.data)
+        await self.coordinator.async_save_settings()
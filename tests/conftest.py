@@ -0,0 +1,26 @@
+"""Load the bundled iDotMatrix client without Home Assistant.
+
+The integration package imports Home Assistant and its directory shadows
+standard library modules (e.g. ``select``), so the client package is
+loaded on its own under the name ``idotmatrix_client``.
+"""
+import importlib.util
+import os
+import sys
+
+CLIENT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "custom_components",
+    "idotmatrix",
+    "client",
+)
+
+if "idotmatrix_client" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "idotmatrix_client",
+        os.path.join(CLIENT_DIR, "__init__.py"),
+        submodule_search_locations=[CLIENT_DIR],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["idotmatrix_client"] = module
+    spec.loader.exec_module(module)
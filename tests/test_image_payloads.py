@@ -0,0 +1,97 @@
+"""Framing of PNG uploads and PNG validation in the Image module."""
+import io
+import math
+import struct
+import zlib
+
+import pytest
+from PIL import Image as PilImage
+
+from idotmatrix_client.modules.image import PNG_SIGNATURE, Image, validatePNG
+
+CHUNK_SIZE = 4096
+HEADER_SIZE = 9
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    body = chunk_type + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+
+def _png(size: int) -> bytes:
+    """Return a valid PNG of exactly ``size`` bytes, padded with a private chunk."""
+    buffer = io.BytesIO()
+    PilImage.new("RGB", (1, 1), (255, 0, 0)).save(buffer, format="PNG")
+    data = buffer.getvalue()
+    head, iend = data[:-12], data[-12:]
+    padding = size - len(data) - 12
+    assert padding >= 0, f"{size} bytes is too small for a padded png"
+    png = head + _chunk(b"prVt", bytes(padding)) + iend
+    assert len(png) == size
+    return png
+
+
+@pytest.mark.parametrize("size", [0, 1])
+def test_payloads_reject_data_too_short_for_a_png(size):
+    with pytest.raises(ValueError):
+        Image()._createPayloads(_png(4096)[:size])
+
+
+@pytest.mark.parametrize("size", [4095, 4096, 4097, 8192, 65535, 65536, 70001])
+def test_payload_headers(size):
+    png = _png(size)
+    payloads = Image()._createPayloads(png)
+
+    assert len(payloads) == math.ceil(size / CHUNK_SIZE)
+    for index, payload in enumerate(payloads):
+        (length,) = struct.unpack_from("<H", payload, 0)
+        (total,) = struct.unpack_from("<I", payload, 5)
+        assert length == len(payload)
+        assert payload[2:4] == b"\x00\x00"
+        assert payload[4] == (0 if index == 0 else 2)
+        assert total == size
+        if index < len(payloads) - 1:
+            assert len(payload) == CHUNK_SIZE + HEADER_SIZE
+
+
+@pytest.mark.parametrize("size", [4095, 4096, 4097, 8192, 65536, 70001])
+def test_payloads_reassemble_to_the_png(size):
+    png = _png(size)
+    payloads = Image()._createPayloads(png)
+    assert b"".join(bytes(payload[HEADER_SIZE:]) for payload in payloads) == png
+    assert Image().framePNG(png) == tuple(bytes(payload) for payload in payloads)
+
+
+def test_validate_accepts_a_png():
+    validatePNG(_png(4097))
+
+
+def test_validate_rejects_bad_signature():
+    png = _png(4096)
+    with pytest.raises(ValueError, match="signature"):
+        validatePNG(b"\x00" + png[1:])
+
+
+def test_validate_rejects_bad_crc():
+    png = bytearray(_png(4096))
+    # last byte of the IHDR data, just before its CRC
+    png[len(PNG_SIGNATURE) + 8 + 12] ^= 0xFF
+    with pytest.raises(ValueError, match="crc"):
+        validatePNG(bytes(png))
+
+
+def test_validate_rejects_truncation():
+    png = _png(4096)
+    with pytest.raises(ValueError, match="truncated"):
+        validatePNG(png[:2000])
+
+
+def test_validate_rejects_missing_iend():
+    png = _png(4096)
+    with pytest.raises(ValueError, match="IEND"):
+        validatePNG(png[:-12])
+
+
+def test_payloads_reject_an_invalid_png():
+    with pytest.raises(ValueError):
+        Image()._createPayloads(_png(4096)[:-12])